@@ -0,0 +1,167 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+DEFAULT_THRESHOLD = 0.92
+DEFAULT_MAX_ENTRIES = 1000
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_VERSION_CHECK_SECONDS = 60.0
+
+
+# Answers keyed on question embeddings, persisted in SQLite. Every entry is tagged
+# with the data version it was produced under; other versions are dropped on load.
+# With a version_source the version is re-read at most every version_check_seconds,
+# and a change drops the old entries while the process keeps running.
+class SemanticAnswerCache:
+
+    def __init__(self, embeddings, path: str, data_version: str, threshold: float = DEFAULT_THRESHOLD,
+                 max_entries: int = DEFAULT_MAX_ENTRIES, ttl_seconds: int = DEFAULT_TTL_SECONDS,
+                 version_source: Optional[Callable[[], str]] = None,
+                 version_check_seconds: float = DEFAULT_VERSION_CHECK_SECONDS):
+        self.embeddings = embeddings
+        self.path = path
+        self.data_version = data_version
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.version_source = version_source
+        self.version_check_seconds = version_check_seconds
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "invalidations": 0}
+        self._lock = threading.Lock()
+        self._version_lock = threading.Lock()
+        self._checked_at = time.monotonic()
+        self._last_embedding = (None, None)
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS answers (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                question TEXT NOT NULL,
+                embedding BLOB NOT NULL,
+                final_answer TEXT NOT NULL,
+                question_type TEXT,
+                data_version TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )""")
+        self._conn.commit()
+        self._load()
+
+    def _load(self):
+        now = time.time()
+        with self._lock:
+            self._conn.execute("DELETE FROM answers WHERE data_version != ? OR created_at < ?",
+                               (self.data_version, now - self.ttl_seconds))
+            self._conn.commit()
+            rows = self._conn.execute("SELECT id, embedding FROM answers ORDER BY id").fetchall()
+            self._ids = [row[0] for row in rows]
+            if rows:
+                self._matrix = np.vstack([np.frombuffer(row[1], dtype=np.float32) for row in rows])
+            else:
+                self._matrix = None
+
+    def _check_version(self):
+        if self.version_source is None:
+            return
+        with self._version_lock:
+            now = time.monotonic()
+            if now - self._checked_at < self.version_check_seconds:
+                return
+            self._checked_at = now
+            try:
+                version = self.version_source()
+            except Exception as e:
+                print(f"Answer cache: could not read the data version: {e}")
+                return
+            if version == self.data_version:
+                return
+            print(f"Answer cache: data version changed ({self.data_version} -> {version}), dropping old answers.")
+            self.data_version = version
+            self.stats["invalidations"] += 1
+            self._load()
+
+    def _embed(self, question: str) -> np.ndarray:
+        # lookup() and store() are called back to back for the same question on a miss.
+        cached_question, cached_vector = self._last_embedding
+        if cached_question == question:
+            return cached_vector
+        vector = np.asarray(self.embeddings.embed_query(question), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector = vector / norm
+        self._last_embedding = (question, vector)
+        return vector
+
+    def lookup(self, question: str) -> Optional[Dict[str, Any]]:
+        self._check_version()
+        vector = self._embed(question)
+        now = time.time()
+        with self._lock:
+            if self._matrix is None:
+                self.stats["misses"] += 1
+                return None
+            similarities = self._matrix @ vector
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            if similarity < self.threshold:
+                self.stats["misses"] += 1
+                return None
+            entry_id = self._ids[best]
+            row = self._conn.execute(
+                "SELECT question, final_answer, question_type, created_at FROM answers WHERE id = ?",
+                (entry_id,)).fetchone()
+            if row is None or row[3] < now - self.ttl_seconds:
+                self._remove(entry_id)
+                self._conn.commit()
+                self.stats["misses"] += 1
+                return None
+            self._conn.execute("UPDATE answers SET last_access = ? WHERE id = ?", (now, entry_id))
+            self._conn.commit()
+            self.stats["hits"] += 1
+        return {"question": row[0], "final_answer": row[1], "question_type": row[2], "similarity": similarity}
+
+    def store(self, question: str, final_answer: str, question_type: Optional[str]):
+        if not final_answer:
+            return
+        self._check_version()
+        vector = self._embed(question)
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO answers (question, embedding, final_answer, question_type, data_version, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (question, vector.tobytes(), final_answer, question_type, self.data_version, now, now))
+            self._ids.append(cursor.lastrowid)
+            self._matrix = vector[None, :] if self._matrix is None else np.vstack([self._matrix, vector])
+            self.stats["stores"] += 1
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        overflow = len(self._ids) - self.max_entries
+        if overflow <= 0:
+            return
+        # Least recently used entries go first.
+        rows = self._conn.execute("SELECT id FROM answers ORDER BY last_access LIMIT ?", (overflow,)).fetchall()
+        for row in rows:
+            self._remove(row[0])
+            self.stats["evictions"] += 1
+
+    def _remove(self, entry_id: int):
+        self._conn.execute("DELETE FROM answers WHERE id = ?", (entry_id,))
+        if entry_id in self._ids:
+            index = self._ids.index(entry_id)
+            del self._ids[index]
+            self._matrix = np.delete(self._matrix, index, axis=0) if self._ids else None
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM answers")
+            self._conn.commit()
+            self._ids = []
+            self._matrix = None
@@ -0,0 +1,234 @@
+import asyncio
+import json
+import os
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from agent_setup import astream_agent_answer, get_answer_cache, get_compiled_graph_app, initialize_agent_resources
+from instrumentation import trace_request
+from memory import ConversationMemory
+from question_utils import is_context_dependent
+
+API_HOST = os.getenv('MEDIBOT_API_HOST', "127.0.0.1")
+API_PORT = int(os.getenv('MEDIBOT_API_PORT', '8000'))
+MAX_CONCURRENCY = int(os.getenv('MEDIBOT_API_MAX_CONCURRENCY', '8'))
+MAX_QUEUE = int(os.getenv('MEDIBOT_API_MAX_QUEUE', '32'))
+QUEUE_TIMEOUT_SECONDS = float(os.getenv('MEDIBOT_API_QUEUE_TIMEOUT', '10'))
+MAX_SESSIONS = int(os.getenv('MEDIBOT_API_MAX_SESSIONS', '1000'))
+SESSION_TTL_SECONDS = int(os.getenv('MEDIBOT_API_SESSION_TTL', '3600'))
+RETRY_AFTER_SECONDS = "1"
+
+
+class ChatRequest(BaseModel):
+    question: str
+    session_id: Optional[str] = None
+
+
+# Admission control: at most max_concurrency requests run the graph, at most
+# max_queue more wait for a slot. Beyond that a request is rejected with 429;
+# one that waits longer than queue_timeout gets 503.
+class ConcurrencyLimiter:
+    def __init__(self, max_concurrency: int, max_queue: int, queue_timeout: float):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.in_flight = 0
+        self.waiting = 0
+        self.stats = {"completed": 0, "rejected": 0, "timed_out": 0}
+
+    async def acquire(self):
+        if self._semaphore.locked() and self.waiting >= self.max_queue:
+            self.stats["rejected"] += 1
+            raise HTTPException(status_code=429, detail="Too many requests queued, retry later.",
+                                headers={"Retry-After": RETRY_AFTER_SECONDS})
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.stats["timed_out"] += 1
+            raise HTTPException(status_code=503, detail="Server busy, retry later.",
+                                headers={"Retry-After": RETRY_AFTER_SECONDS})
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+
+    def release(self):
+        self.in_flight -= 1
+        self.stats["completed"] += 1
+        self._semaphore.release()
+
+
+class Session:
+    def __init__(self, llm):
+        self.memory = ConversationMemory(llm=llm)
+        # Turns of one session run one after another, so the history stays ordered.
+        self.lock = asyncio.Lock()
+        self.last_used = time.time()
+
+
+# In-memory sessions, least recently used first; idle or surplus sessions are dropped.
+class SessionStore:
+    def __init__(self, max_sessions: int = MAX_SESSIONS, ttl_seconds: int = SESSION_TTL_SECONDS):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._sessions = OrderedDict()
+
+    def get(self, session_id: Optional[str]):
+        self._evict()
+        session_id = session_id or uuid.uuid4().hex
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = Session(initialize_agent_resources().get('llm'))
+            self._sessions[session_id] = session
+        self._sessions.move_to_end(session_id)
+        session.last_used = time.time()
+        return session_id, session
+
+    def delete(self, session_id: str) -> bool:
+        return self._sessions.pop(session_id, None) is not None
+
+    def _evict(self):
+        # Oldest first; a session with a turn in progress is skipped, not waited for,
+        # so one busy session cannot keep the store above max_sessions.
+        cutoff = time.time() - self.ttl_seconds
+        for session_id, session in list(self._sessions.items()):
+            if len(self._sessions) < self.max_sessions and session.last_used >= cutoff:
+                break
+            if not session.lock.locked():
+                del self._sessions[session_id]
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+limiter = ConcurrencyLimiter(MAX_CONCURRENCY, MAX_QUEUE, QUEUE_TIMEOUT_SECONDS)
+sessions = SessionStore()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build the graph and the answer cache before the first request arrives; the
+    # cache loads the embedding model, which must not happen on the event loop.
+    await asyncio.to_thread(get_compiled_graph_app)
+    await asyncio.to_thread(get_answer_cache)
+    yield
+
+
+app = FastAPI(title="MediBot API", lifespan=lifespan)
+
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def answer_events(question: str, session_id: str, session: Session):
+    # Yields ("token", text) while the answer is generated, then ("final", result).
+    async with session.lock:
+        start_time = time.perf_counter()
+        # Cached after the first call (and warmed in lifespan), but never built on the event loop.
+        answer_cache = await asyncio.to_thread(get_answer_cache)
+        use_cache = answer_cache is not None and not is_context_dependent(question)
+        cached = await asyncio.to_thread(answer_cache.lookup, question) if use_cache else None
+        if cached:
+            answer, route, error = cached["final_answer"], cached["question_type"], None
+            sources = []
+            yield "token", answer
+        else:
+            inputs = {"question": question, "chat_history": session.memory.as_messages()}
+            response_state = {}
+            with trace_request(question, session_id=session_id) as trace:
+                async for event_type, payload in astream_agent_answer(get_compiled_graph_app(), inputs):
+                    if event_type == "token":
+                        yield "token", payload
+                    else:
+                        response_state = payload or {}
+                if trace is not None:
+                    trace["route"] = response_state.get("question_type")
+            answer = response_state.get('final_answer', 'Sorry, no answer was found.')
+            route, error = response_state.get('question_type'), response_state.get('error')
+            sources = response_state.get('rag_sources') or []
+            if use_cache and not error:
+                await asyncio.to_thread(answer_cache.store, question, answer, route)
+        # Folding old turns may call the LLM, so it runs off the event loop.
+        await asyncio.to_thread(session.memory.add_turn, question, answer)
+        yield "final", {
+            "session_id": session_id,
+            "answer": answer,
+            "route": route,
+            "sources": sources,
+            "error": error,
+            "cached": bool(cached),
+            "duration_seconds": time.perf_counter() - start_time,
+        }
+
+
+@app.get("/health")
+async def health():
+    return {
+        "status": "ok",
+        "in_flight": limiter.in_flight,
+        "waiting": limiter.waiting,
+        "sessions": len(sessions),
+        **limiter.stats,
+    }
+
+
+@app.post("/chat")
+async def chat(request: ChatRequest):
+    await limiter.acquire()
+    try:
+        session_id, session = sessions.get(request.session_id)
+        result = None
+        # Run the generator to completion so the session lock is released before returning.
+        async for event_type, payload in answer_events(request.question, session_id, session):
+            if event_type == "final":
+                result = payload
+        return result
+    finally:
+        limiter.release()
+
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    # The slot is taken before the response starts, so overload is reported with a
+    # status code instead of an error event in an already-open stream.
+    await limiter.acquire()
+    try:
+        session_id, session = sessions.get(request.session_id)
+    except Exception:
+        limiter.release()
+        raise
+
+    async def event_stream():
+        try:
+            async for event_type, payload in answer_events(request.question, session_id, session):
+                yield sse_event(event_type, {"text": payload} if event_type == "token" else payload)
+        except Exception as e:
+            print(f"Error while streaming answer: {e}")
+            yield sse_event("error", {"session_id": session_id, "error": str(e)})
+        finally:
+            limiter.release()
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Session-Id": session_id})
+
+
+@app.delete("/sessions/{session_id}")
+async def delete_session(session_id: str):
+    if not sessions.delete(session_id):
+        raise HTTPException(status_code=404, detail="Unknown session.")
+    return {"deleted": session_id}
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, host=API_HOST, port=API_PORT)
@@ -0,0 +1,228 @@
+import re
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from agent_setup import (
+    RAG_MODE, clean_sql_query, format_history_for_prompt, format_passages, get_agent_chains, get_question_router,
+    get_sql_cache, get_sql_template_matcher, initialize_agent_resources, passage_sources, run_sql_query,
+)
+from question_utils import normalize_question
+from router import keyword_route
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_GROUP_SIZE = 10
+GROUPED_LABEL_PATTERN = re.compile(r"^\W*(\d+)\s*[:.)-]\s*\W*(sql|rag|general)\b", re.IGNORECASE | re.MULTILINE)
+
+
+def parse_grouped_classification(text: str, count: int) -> List[Optional[str]]:
+    labels = [None] * count
+    for number, label in GROUPED_LABEL_PATTERN.findall(text):
+        index = int(number) - 1
+        if 0 <= index < count and labels[index] is None:
+            labels[index] = label.lower()
+    return labels
+
+
+def run_parallel(calls: List[Callable[[], Any]], concurrency: int) -> List[Any]:
+    # Results come back in call order; a failed call yields its exception instead.
+    def run_call(call):
+        try:
+            return call()
+        except Exception as e:
+            return e
+
+    if not calls:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(calls)))) as pool:
+        return list(pool.map(run_call, calls))
+
+
+def _classify(items, resources, chains, router, concurrency, group_size, stats):
+    questions = [item["question"] for item in items]
+    routed = router.route_batch(questions) if router else [(None, 0.0)] * len(items)
+    unresolved = []
+    for item, (label, _) in zip(items, routed):
+        if label:
+            item["question_type"] = label
+        else:
+            unresolved.append(item)
+    stats["router_hits"] = len(items) - len(unresolved)
+
+    # Questions the router is unsure about go to the LLM, group_size per prompt.
+    groups = [unresolved[start:start + group_size] for start in range(0, len(unresolved), group_size)]
+    calls = [
+        lambda group=group: chains['grouped_classification'].invoke({
+            "questions": "\n".join(f"{number}. {item['question']}" for number, item in enumerate(group, 1))
+        })
+        for group in groups
+    ]
+    stats["llm_calls"] += len(calls)
+    for group, output in zip(groups, run_parallel(calls, concurrency)):
+        if isinstance(output, Exception):
+            print(f"Grouped classification failed, using keyword routing: {output}")
+            output = ""
+        for item, label in zip(group, parse_grouped_classification(output, len(group))):
+            item["question_type"] = label or keyword_route(item["question"])
+
+    for item in items:
+        if item["question_type"] == "sql" and not resources.get('db'):
+            item["question_type"], item["error"] = "general", "Database connection is unavailable."
+        elif item["question_type"] == "rag" and not resources.get('qa_chain'):
+            item["question_type"], item["error"] = "general", "RAG system is unavailable."
+
+
+def _run_sql(items, resources, chains, concurrency, stats):
+    sql_cache = get_sql_cache()
+    sql_templates = get_sql_template_matcher()
+    to_generate = []
+    for item in items:
+        template_match = sql_templates.match(item["question"]) if sql_templates else None
+        if template_match:
+            item["sql_query"], item["sql_params"] = template_match.sql, template_match.params
+            stats["template_hits"] += 1
+            continue
+        cached_sql = sql_cache.get_sql(item["question"]) if sql_cache else None
+        if cached_sql:
+            item["sql_query"] = cached_sql
+        else:
+            to_generate.append(item)
+    # Repeats of the same question within the batch share one generation.
+    by_question = {}
+    for item in to_generate:
+        by_question.setdefault(normalize_question(item["question"]), []).append(item)
+    groups = list(by_question.values())
+    calls = [lambda group=group: chains['sql_generation'].invoke({"question": group[0]["question"]}) for group in groups]
+    stats["llm_calls"] += len(calls)
+    for group, output in zip(groups, run_parallel(calls, concurrency)):
+        sql_query = "" if isinstance(output, Exception) else output.strip().replace("```sql", "").replace("```", "").strip()
+        for item in group:
+            if isinstance(output, Exception):
+                item["error"] = f"Failed to generate SQL: {output}"
+            elif sql_query:
+                item["sql_query"] = sql_query
+            else:
+                item["error"] = "Failed to generate SQL: LLM failed to generate a valid-looking SQL query."
+
+    runnable = [item for item in items if not item["error"]]
+    if not runnable:
+        return
+    # All queries share one pooled connection; the SQL guard gives each its own read-only transaction.
+    with resources['db_engine'].connect() as connection:
+        for item in runnable:
+            sql_query = clean_sql_query(item["sql_query"])
+            sql_params = item["sql_params"]
+            item["sql_result"] = sql_cache.get_result(sql_query, sql_params) if sql_cache else None
+            if item["sql_result"] is not None:
+                continue
+            try:
+                item["sql_result"] = run_sql_query(connection, sql_query, sql_params)
+            except Exception as e:
+                item["error"] = f"SQL Execution Error: {e}"
+                # A failed statement aborts the transaction; later queries need a fresh one.
+                connection.rollback()
+                continue
+            if sql_cache:
+                sql_cache.put_result(sql_query, item["sql_result"], sql_params)
+                if not sql_params:
+                    sql_cache.put_sql(item["question"], sql_query)
+
+
+def _run_rag(items, resources, concurrency, stats):
+    retriever = resources['retriever']
+    queries = [item["question"] for item in items]
+    try:
+        # One encoder call for all queries when the retriever supports it.
+        if hasattr(retriever, "batch_search"):
+            document_lists = retriever.batch_search(queries)
+        else:
+            document_lists = [retriever.invoke(query) for query in queries]
+    except Exception as e:
+        print(f"Batch retrieval failed: {e}\n{traceback.format_exc()}")
+        for item in items:
+            item["error"] = f"Failed during RAG execution: {e}"
+        return
+
+    for item, documents in zip(items, document_lists):
+        item["rag_sources"] = passage_sources(documents)
+    if RAG_MODE == "single":
+        # The passages go straight to the answer stage; no separate RAG generation.
+        for item, documents in zip(items, document_lists):
+            item["rag_result"] = format_passages(documents)
+        return
+    combine_chain = resources['qa_chain'].combine_documents_chain
+    calls = [
+        lambda item=item, documents=documents: combine_chain.invoke(
+            {"input_documents": documents, "question": item["question"]})["output_text"]
+        for item, documents in zip(items, document_lists)
+    ]
+    stats["llm_calls"] += len(calls)
+    for item, output in zip(items, run_parallel(calls, concurrency)):
+        if isinstance(output, Exception):
+            item["error"] = f"Failed during RAG execution: {output}"
+        else:
+            item["rag_result"] = output
+
+
+def _generate_answers(items, chains, concurrency, stats):
+    empty_history = format_history_for_prompt([])
+    calls = []
+    for item in items:
+        error = item["error"]
+        if item["question_type"] == "sql":
+            chain = chains['answer_sql']
+            prompt_input = {"sql_result": item["sql_result"] if not error else f"An error occurred: {error}"}
+        elif item["question_type"] == "rag":
+            chain = chains['answer_rag_passages'] if RAG_MODE == "single" else chains['answer_rag']
+            prompt_input = {"rag_result": item["rag_result"] if not error
+                            else f"An error occurred during information retrieval: {error}"}
+        else:
+            chain = chains['answer_general_error'] if error else chains['answer_general']
+            prompt_input = {"error": error or ""}
+        prompt_input.update({"question": item["question"], "chat_history": empty_history})
+        calls.append(lambda chain=chain, prompt_input=prompt_input: chain.invoke(prompt_input))
+    stats["llm_calls"] += len(calls)
+    for item, output in zip(items, run_parallel(calls, concurrency)):
+        if isinstance(output, Exception):
+            item["final_answer"] = f"Failed to generate the final answer. Error: {output}"
+            item["error"] = str(output)
+        else:
+            item["final_answer"] = output
+
+
+# Answers independent questions (no chat history) in stages instead of one graph run
+# each: batched router + grouped classification prompts, SQL on one connection, one
+# encoder call for all RAG queries, and LLM calls dispatched `concurrency` at a time.
+# Every result has the same keys as the state returned by agent_app.invoke.
+def answer_batch(questions: List[str], concurrency: int = DEFAULT_CONCURRENCY, group_size: int = DEFAULT_GROUP_SIZE,
+                 stats: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    stats = stats if stats is not None else {}
+    stats.update({"questions": len(questions), "llm_calls": 0, "template_hits": 0})
+    resources = initialize_agent_resources()
+    chains = get_agent_chains()
+    items = [{"question": question, "question_type": None, "sql_query": None, "sql_params": None, "sql_result": None,
+              "rag_result": None, "rag_sources": None, "final_answer": None, "error": None} for question in questions]
+
+    start_time = time.perf_counter()
+    _classify(items, resources, chains, get_question_router(), concurrency, group_size, stats)
+    stats["classify_seconds"] = time.perf_counter() - start_time
+
+    sql_items = [item for item in items if item["question_type"] == "sql"]
+    rag_items = [item for item in items if item["question_type"] == "rag"]
+    stage_start = time.perf_counter()
+    if sql_items:
+        _run_sql(sql_items, resources, chains, concurrency, stats)
+    stats["sql_seconds"] = time.perf_counter() - stage_start
+
+    stage_start = time.perf_counter()
+    if rag_items:
+        _run_rag(rag_items, resources, concurrency, stats)
+    stats["rag_seconds"] = time.perf_counter() - stage_start
+
+    stage_start = time.perf_counter()
+    _generate_answers(items, chains, concurrency, stats)
+    stats["answer_seconds"] = time.perf_counter() - stage_start
+    stats["total_seconds"] = time.perf_counter() - start_time
+    stats["routes"] = {route: sum(1 for item in items if item["question_type"] == route) for route in ("sql", "rag", "general")}
+    return items
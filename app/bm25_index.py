@@ -0,0 +1,131 @@
+import json
+import math
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for", "from", "how", "i",
+    "in", "is", "it", "me", "my", "of", "on", "or", "tell", "that", "the", "this", "to", "what",
+    "when", "which", "who", "why", "with", "you", "your", "about", "there", "any", "some",
+}
+DEFAULT_K1 = 1.5
+DEFAULT_B = 0.75
+RRF_K = 60
+
+
+def tokenize(text: str) -> List[str]:
+    # Alphanumeric runs keep terms like "a1c", "als" or "covid19" intact.
+    return [token for token in re.findall(r"[a-z0-9]+", text.lower()) if token not in STOPWORDS]
+
+
+def document_key(document: Document) -> Tuple[Any, ...]:
+    metadata = document.metadata or {}
+    if "article" in metadata and "chunk" in metadata:
+        return (metadata["article"], metadata["chunk"])
+    return (document.page_content,)
+
+
+# Okapi BM25 over the same chunks as the vector store. IDF values and postings are
+# computed at build time and stored as JSON, so loading is a single json.load.
+class BM25Index:
+    def __init__(self, texts: List[str], metadatas: List[Dict[str, Any]], postings: Dict[str, List[List[float]]],
+                 doc_lengths: List[int], k1: float = DEFAULT_K1, b: float = DEFAULT_B, index_version: Optional[str] = None):
+        self.texts = texts
+        self.metadatas = metadatas
+        self.postings = postings
+        self.doc_lengths = doc_lengths
+        self.k1 = k1
+        self.b = b
+        self.index_version = index_version
+        self.avg_length = sum(doc_lengths) / len(doc_lengths) if doc_lengths else 0.0
+
+    @classmethod
+    def build(cls, texts: List[str], metadatas: List[Dict[str, Any]], k1: float = DEFAULT_K1, b: float = DEFAULT_B,
+              index_version: Optional[str] = None) -> "BM25Index":
+        term_frequencies: Dict[str, Dict[int, int]] = {}
+        doc_lengths = []
+        for doc_index, text in enumerate(texts):
+            tokens = tokenize(text)
+            doc_lengths.append(len(tokens))
+            for token in tokens:
+                counts = term_frequencies.setdefault(token, {})
+                counts[doc_index] = counts.get(doc_index, 0) + 1
+        doc_count = len(texts)
+        postings = {}
+        for term, counts in term_frequencies.items():
+            idf = math.log(1 + (doc_count - len(counts) + 0.5) / (len(counts) + 0.5))
+            # The first entry of every posting list is the term's IDF.
+            postings[term] = [[idf]] + [[doc_index, tf] for doc_index, tf in sorted(counts.items())]
+        return cls(texts, metadatas, postings, doc_lengths, k1=k1, b=b, index_version=index_version)
+
+    def save(self, path: str):
+        data = {
+            "k1": self.k1, "b": self.b, "index_version": self.index_version,
+            "texts": self.texts, "metadatas": self.metadatas,
+            "doc_lengths": self.doc_lengths, "postings": self.postings,
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'))
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data["texts"], data["metadatas"], data["postings"], data["doc_lengths"],
+                   k1=data["k1"], b=data["b"], index_version=data.get("index_version"))
+
+    def search(self, query: str, k: int) -> List[Tuple[int, float]]:
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            idf = posting[0][0]
+            for doc_index, tf in posting[1:]:
+                length_norm = 1 - self.b + self.b * self.doc_lengths[doc_index] / self.avg_length
+                scores[doc_index] = scores.get(doc_index, 0.0) + idf * tf * (self.k1 + 1) / (tf + self.k1 * length_norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+    def document(self, doc_index: int) -> Document:
+        return Document(page_content=self.texts[doc_index], metadata=dict(self.metadatas[doc_index]))
+
+
+def reciprocal_rank_fusion(ranked_lists: List[List[Document]], k: int, rrf_k: int = RRF_K) -> List[Document]:
+    scores: Dict[Tuple[Any, ...], float] = {}
+    documents: Dict[Tuple[Any, ...], Document] = {}
+    for ranked in ranked_lists:
+        for rank, document in enumerate(ranked):
+            key = document_key(document)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank + 1)
+            documents.setdefault(key, document)
+    best = sorted(scores, key=scores.get, reverse=True)[:k]
+    return [documents[key] for key in best]
+
+
+# Fuses dense and BM25 candidates with reciprocal rank fusion and keeps the top k,
+# so exact terms the embedding misses still reach the prompt without raising k.
+class HybridRetriever(BaseRetriever):
+    dense_retriever: BaseRetriever
+    bm25_index: Any
+    k: int = 3
+    candidate_k: int = 10
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        dense_documents = self.dense_retriever.invoke(query, config={"callbacks": run_manager.get_child()})
+        return reciprocal_rank_fusion([dense_documents[:self.candidate_k], self._sparse_documents(query)], self.k)
+
+    def _sparse_documents(self, query: str) -> List[Document]:
+        return [self.bm25_index.document(doc_index) for doc_index, _ in self.bm25_index.search(query, self.candidate_k)]
+
+    def batch_search(self, queries: List[str]) -> List[List[Document]]:
+        # Dense candidates for all queries in one encoder call when the dense side supports it.
+        if hasattr(self.dense_retriever, "batch_search"):
+            dense_lists = self.dense_retriever.batch_search(queries)
+        else:
+            dense_lists = [self.dense_retriever.invoke(query) for query in queries]
+        return [reciprocal_rank_fusion([dense_documents[:self.candidate_k], self._sparse_documents(query)], self.k)
+                for query, dense_documents in zip(queries, dense_lists)]
@@ -0,0 +1,20 @@
+from typing import Any, List
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+
+# Same results as Chroma.as_retriever(search_kwargs={"k": k}), plus batch_search,
+# which encodes all queries in a single embeddings call.
+class ChromaRetriever(BaseRetriever):
+    vectorstore: Any
+    embeddings: Any
+    k: int = 3
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return self.vectorstore.similarity_search(query, k=self.k)
+
+    def batch_search(self, queries: List[str]) -> List[List[Document]]:
+        vectors = self.embeddings.embed_documents(queries)
+        return [self.vectorstore.similarity_search_by_vector(vector, k=self.k) for vector in vectors]
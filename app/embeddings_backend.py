@@ -0,0 +1,54 @@
+import os
+import threading
+from typing import List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+ONNX_MODEL_DIRECTORY = '../models/all-MiniLM-L6-v2-onnx'
+EMBEDDINGS_BACKEND = os.getenv('MEDIBOT_EMBEDDINGS_BACKEND', "huggingface")
+EMBEDDINGS_BACKENDS = ("huggingface", "onnx", "onnx-int8")
+
+
+def load_embeddings(backend: Optional[str] = None, num_threads: Optional[int] = None, lazy: bool = False):
+    # Every consumer (retriever, answer cache, router, index build) goes through
+    # here, so corpus and query vectors always come from the same backend.
+    backend = backend or EMBEDDINGS_BACKEND
+    if backend not in EMBEDDINGS_BACKENDS:
+        raise ValueError(f"Unknown embeddings backend '{backend}', expected one of {EMBEDDINGS_BACKENDS}")
+    if lazy:
+        return LazyEmbeddings(backend, num_threads)
+    if backend in ("onnx", "onnx-int8"):
+        from onnx_embeddings import OnnxEmbeddings
+        return OnnxEmbeddings(ONNX_MODEL_DIRECTORY, quantized=backend == "onnx-int8", num_threads=num_threads)
+
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+    if num_threads:
+        import torch
+        torch.set_num_threads(num_threads)
+    return HuggingFaceEmbeddings(
+        model_name=EMBEDDING_MODEL_NAME, model_kwargs={'device': 'cpu'}, encode_kwargs={'normalize_embeddings': False}
+    )
+
+
+# Defers loading the model (and importing torch) until the first embed call,
+# so the app can render before the encoder is needed.
+class LazyEmbeddings(Embeddings):
+    def __init__(self, backend: str, num_threads: Optional[int] = None):
+        self.backend = backend
+        self.num_threads = num_threads
+        self._model = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = load_embeddings(self.backend, self.num_threads)
+        return self._model
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.load().embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.load().embed_query(text)
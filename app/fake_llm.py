@@ -0,0 +1,138 @@
+import json
+import re
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from router import keyword_route
+
+CHARS_PER_TOKEN = 4
+KNOWN_SPECIALIZATIONS = (
+    "Cardiology", "Dermatology", "Gynecology", "Internal Medicine", "Neurology",
+    "Ophthalmology", "Orthopedics", "Pediatrics", "Psychiatry", "Surgery",
+)
+
+
+def load_script(path: Optional[str]) -> List[Dict[str, str]]:
+    # A script is a JSON list of {"match": <regex>, "response": <text>} rules,
+    # tried in order against the rendered prompt before the built-in rules.
+    if not path:
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _extract_question(prompt: str) -> str:
+    match = re.search(r"User Question:\s*(.*)", prompt) or re.search(r"Question:\s*\n\s*(.*)", prompt)
+    if match:
+        return match.group(1).strip()
+    lines = prompt.strip().splitlines()
+    return lines[-1] if lines else ""
+
+
+def _fake_sql(question: str) -> str:
+    question_lower = question.lower()
+    for specialization in KNOWN_SPECIALIZATIONS:
+        if specialization.lower()[:6] in question_lower:
+            return f"SELECT doctor_name, specialization FROM doctors WHERE specialization ILIKE '%{specialization}%'"
+    if "how many" in question_lower:
+        return "SELECT COUNT(*) FROM doctors"
+    return ("SELECT d.doctor_name, d.specialization, i.institution_name FROM doctors d "
+            "JOIN institutions i ON d.institution_id = i.id LIMIT 10")
+
+
+# Deterministic stand-in for ChatOllama. It recognises the agent's prompts
+# (classification, grouped classification, SQL generation, memory summary,
+# answers) and replies with rule-based text, paced by first_token_latency and
+# tokens_per_second so the rest of the pipeline can be benchmarked without a
+# live model.
+class FakeChatModel(BaseChatModel):
+    first_token_latency: float = 0.0
+    tokens_per_second: float = 0.0
+    answer_tokens: int = 60
+    script: List[Dict[str, str]] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "medibot-fake"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"first_token_latency": self.first_token_latency, "tokens_per_second": self.tokens_per_second}
+
+    def _respond(self, prompt: str) -> str:
+        for rule in self.script:
+            if re.search(rule["match"], prompt, flags=re.IGNORECASE | re.DOTALL):
+                return rule["response"]
+        if "Classifications (one line per question" in prompt:
+            numbered = re.findall(r"^\s*(\d+)\.\s+(.*)$", prompt.split("Questions:", 1)[-1], flags=re.MULTILINE)
+            return "\n".join(f"{number}: {keyword_route(question)}" for number, question in numbered)
+        question = _extract_question(prompt)
+        if "Classification (respond with only" in prompt:
+            return keyword_route(question)
+        if prompt.rstrip().endswith("SQL Query:"):
+            return _fake_sql(question)
+        if prompt.rstrip().endswith("Updated summary:"):
+            return f"The user asked about: {question[:200]}"
+        words = f"This is a scripted answer to the question: {question}".split()
+        filler = ["Please", "consult", "a", "healthcare", "professional", "for", "personal", "advice."]
+        while len(words) < self.answer_tokens:
+            words.extend(filler)
+        return " ".join(words[:max(self.answer_tokens, 1)])
+
+    @staticmethod
+    def _prompt_text(messages: List[BaseMessage]) -> str:
+        return "\n".join(str(message.content) for message in messages)
+
+    def _pieces(self, text: str) -> List[str]:
+        return re.findall(r"\S+\s*", text) or [text]
+
+    def _usage(self, prompt: str, completion: str) -> Dict[str, int]:
+        prompt_tokens = len(prompt) // CHARS_PER_TOKEN
+        completion_tokens = len(self._pieces(completion))
+        return {"input_tokens": prompt_tokens, "output_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens}
+
+    def _apply_stop(self, text: str, stop: Optional[List[str]]) -> str:
+        for stop_sequence in stop or []:
+            if stop_sequence in text:
+                text = text[:text.index(stop_sequence)]
+        return text
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        prompt = self._prompt_text(messages)
+        text = self._apply_stop(self._respond(prompt), stop)
+        usage = self._usage(prompt, text)
+        delay = self.first_token_latency
+        if self.tokens_per_second > 0:
+            delay += usage["output_tokens"] / self.tokens_per_second
+        if delay > 0:
+            time.sleep(delay)
+        message = AIMessage(content=text, usage_metadata=usage)
+        generation_info = {"prompt_eval_count": usage["input_tokens"], "eval_count": usage["output_tokens"]}
+        return ChatResult(generations=[ChatGeneration(message=message, generation_info=generation_info)])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        prompt = self._prompt_text(messages)
+        text = self._apply_stop(self._respond(prompt), stop)
+        usage = self._usage(prompt, text)
+        if self.first_token_latency > 0:
+            time.sleep(self.first_token_latency)
+        pieces = self._pieces(text)
+        for i, piece in enumerate(pieces):
+            if i > 0 and self.tokens_per_second > 0:
+                time.sleep(1.0 / self.tokens_per_second)
+            is_last = i == len(pieces) - 1
+            chunk = ChatGenerationChunk(
+                message=AIMessageChunk(content=piece, usage_metadata=usage if is_last else None),
+                generation_info={"prompt_eval_count": usage["input_tokens"], "eval_count": usage["output_tokens"]} if is_last else None,
+            )
+            if run_manager:
+                run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield chunk
@@ -0,0 +1,230 @@
+import contextlib
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+METRICS_ENABLED = os.getenv('MEDIBOT_METRICS', '0') == '1'
+METRICS_PORT = int(os.getenv('MEDIBOT_METRICS_PORT', '9108'))
+TRACE_PATH = os.getenv('MEDIBOT_TRACE_PATH', '../logs/traces.jsonl')
+STARTUP_REPORT_PATH = os.getenv('MEDIBOT_STARTUP_REPORT_PATH', '../logs/startup.jsonl')
+
+_current_request = contextvars.ContextVar('medibot_request_trace', default=None)
+_current_node = contextvars.ContextVar('medibot_node_record', default=None)
+_trace_lock = threading.Lock()
+_server_lock = threading.Lock()
+_server_started = False
+_metrics = None
+_startup_lock = threading.Lock()
+_startup_phases = {}
+_startup_reported = False
+
+
+def _get_metrics():
+    global _metrics
+    if _metrics is None:
+        from prometheus_client import Counter, Histogram
+
+        _metrics = {
+            "node_duration": Histogram(
+                'medibot_node_duration_seconds', 'Time spent in each agent graph node.', ['node'],
+                buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40)),
+            "node_errors": Counter('medibot_node_errors_total', 'Agent graph node failures.', ['node']),
+            "llm_tokens": Counter('medibot_llm_tokens_total', 'LLM tokens by node and kind.', ['node', 'kind']),
+            "retrieval_hits": Histogram(
+                'medibot_retrieval_hits', 'Documents returned per retrieval.', ['node'],
+                buckets=(0, 1, 2, 3, 5, 10, 20)),
+            "speculation": Histogram(
+                'medibot_speculation_seconds', 'Run time of speculative branches by outcome.', ['branch', 'outcome'],
+                buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)),
+            "request_duration": Histogram(
+                'medibot_request_duration_seconds', 'End-to-end agent request time by route.', ['route'],
+                buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80)),
+        }
+    return _metrics
+
+
+def start_metrics_server():
+    global _server_started
+    if not METRICS_ENABLED:
+        return
+    with _server_lock:
+        if _server_started:
+            return
+        from prometheus_client import start_http_server
+
+        try:
+            start_http_server(METRICS_PORT)
+            print(f"Prometheus metrics exposed on port {METRICS_PORT}")
+        except OSError as e:
+            print(f"Could not start metrics server on port {METRICS_PORT}: {e}")
+        _server_started = True
+
+
+def llm_callbacks():
+    return [TokenUsageHandler()] if METRICS_ENABLED else []
+
+
+def record_retrieval(hit_count: int):
+    record = _current_node.get()
+    if record is not None:
+        record["retrieval_hits"] = (record.get("retrieval_hits") or 0) + hit_count
+
+
+def record_speculation(timing: Dict[str, Any]):
+    # Per-branch timing of a speculative task, attached to the node that started it.
+    record = _current_node.get()
+    if record is None:
+        return
+    record.setdefault("speculation", []).append(timing)
+    _get_metrics()["speculation"].labels(timing["branch"], timing["outcome"]).observe(
+        timing["branch_seconds"] or 0.0)
+
+
+def instrument_node(name: str, fn: Callable[[Dict[str, Any]], Dict[str, Any]]):
+    # With metrics disabled the node function is returned unwrapped: zero overhead.
+    if not METRICS_ENABLED:
+        return fn
+
+    metrics = _get_metrics()
+
+    @functools.wraps(fn)
+    def wrapper(state):
+        record = {"node": name, "prompt_tokens": 0, "completion_tokens": 0, "retrieval_hits": None, "error": None}
+        token = _current_node.set(record)
+        start_time = time.perf_counter()
+        try:
+            result = fn(state)
+            # Nodes report most failures through the "error" key instead of raising.
+            if isinstance(result, dict) and result.get("error") and result.get("error") != state.get("error"):
+                record["error"] = result["error"]
+            return result
+        except Exception as e:
+            record["error"] = repr(e)
+            raise
+        finally:
+            _current_node.reset(token)
+            record["duration_seconds"] = time.perf_counter() - start_time
+            metrics["node_duration"].labels(name).observe(record["duration_seconds"])
+            if record["error"]:
+                metrics["node_errors"].labels(name).inc()
+            if record["prompt_tokens"]:
+                metrics["llm_tokens"].labels(name, "prompt").inc(record["prompt_tokens"])
+            if record["completion_tokens"]:
+                metrics["llm_tokens"].labels(name, "completion").inc(record["completion_tokens"])
+            if record["retrieval_hits"] is not None:
+                metrics["retrieval_hits"].labels(name).observe(record["retrieval_hits"])
+            trace = _current_request.get()
+            if trace is not None:
+                trace["nodes"].append(record)
+
+    return wrapper
+
+
+@contextlib.contextmanager
+def trace_request(question: str, session_id: Optional[str] = None):
+    # Collects the node records of one agent request and appends them to TRACE_PATH
+    # as a single JSON line. Callers may set trace["route"] before the block exits.
+    if not METRICS_ENABLED:
+        yield None
+        return
+    trace = {
+        "request_id": uuid.uuid4().hex,
+        "session_id": session_id,
+        "question": question,
+        "started_at": time.time(),
+        "route": None,
+        "nodes": [],
+        "error": None,
+    }
+    token = _current_request.set(trace)
+    start_time = time.perf_counter()
+    try:
+        yield trace
+    except Exception as e:
+        trace["error"] = repr(e)
+        raise
+    finally:
+        _current_request.reset(token)
+        trace["duration_seconds"] = time.perf_counter() - start_time
+        _get_metrics()["request_duration"].labels(trace["route"] or "unknown").observe(trace["duration_seconds"])
+        _write_trace(trace)
+
+
+def _write_trace(trace):
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(TRACE_PATH)), exist_ok=True)
+        with _trace_lock:
+            with open(TRACE_PATH, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(trace, default=str) + "\n")
+    except IOError as e:
+        print(f"Could not write trace to {TRACE_PATH}: {e}")
+
+
+def seconds_since_process_start() -> float:
+    try:
+        import psutil
+        return time.time() - psutil.Process(os.getpid()).create_time()
+    except Exception:
+        return time.process_time()
+
+
+def mark_startup(phase: str) -> float:
+    # Records when a startup phase was first reached, in seconds since the process started.
+    elapsed = seconds_since_process_start()
+    with _startup_lock:
+        if phase in _startup_phases:
+            return _startup_phases[phase]
+        _startup_phases[phase] = elapsed
+    print(f"Startup: {phase} after {elapsed:.2f}s")
+    return elapsed
+
+
+def report_startup():
+    # Written once per process, at the end of the first script run.
+    global _startup_reported
+    with _startup_lock:
+        if _startup_reported:
+            return
+        _startup_reported = True
+        report = {"pid": os.getpid(), "reported_at": time.time(), "phases": dict(_startup_phases)}
+    print("Startup report: " + ", ".join(f"{phase} {seconds:.2f}s" for phase, seconds in report["phases"].items()))
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(STARTUP_REPORT_PATH)), exist_ok=True)
+        with open(STARTUP_REPORT_PATH, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(report) + "\n")
+    except IOError as e:
+        print(f"Could not write startup report to {STARTUP_REPORT_PATH}: {e}")
+
+
+def _extract_token_counts(response):
+    prompt_tokens, completion_tokens = 0, 0
+    for generations in response.generations:
+        for generation in generations:
+            message = getattr(generation, "message", None)
+            usage = getattr(message, "usage_metadata", None) if message is not None else None
+            if usage:
+                prompt_tokens += usage.get("input_tokens", 0)
+                completion_tokens += usage.get("output_tokens", 0)
+                continue
+            # ChatOllama reports Ollama's raw counters in generation_info.
+            info = generation.generation_info or {}
+            prompt_tokens += info.get("prompt_eval_count") or 0
+            completion_tokens += info.get("eval_count") or 0
+    return prompt_tokens, completion_tokens
+
+
+class TokenUsageHandler(BaseCallbackHandler):
+    def on_llm_end(self, response, **kwargs):
+        record = _current_node.get()
+        if record is None:
+            return
+        prompt_tokens, completion_tokens = _extract_token_counts(response)
+        record["prompt_tokens"] += prompt_tokens
+        record["completion_tokens"] += completion_tokens
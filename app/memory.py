@@ -0,0 +1,106 @@
+from typing import List, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+
+DEFAULT_TOKEN_BUDGET = 800
+DEFAULT_KEEP_TURNS = 4
+DEFAULT_FOLD_BATCH = 2
+DEFAULT_SUMMARY_TOKEN_BUDGET = 200
+CHARS_PER_TOKEN = 4
+
+SUMMARY_PROMPT_TEMPLATE = """You maintain a short running summary of a conversation between a user and a medical assistant. Keep names of doctors, institutions, diseases and any facts the user may refer back to. Use at most {max_words} words.
+
+Current summary:
+{summary}
+
+New conversation lines:
+{new_lines}
+
+Updated summary:"""
+
+
+def estimate_tokens(text: str) -> int:
+    # Rough count (about 4 characters per token) that is good enough for budgeting.
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    return text[:max(max_chars - 3, 0)].rstrip() + "..."
+
+
+def format_turn(question: str, answer: str) -> str:
+    return f"Human: {question}\nAssistant: {answer}"
+
+
+# Keeps the last keep_turns turns verbatim. Older turns are folded, fold_batch at a
+# time, into a running summary, so each turn is summarized once and the history
+# sent to the prompts never exceeds token_budget.
+class ConversationMemory:
+    def __init__(self, llm=None, token_budget: int = DEFAULT_TOKEN_BUDGET, keep_turns: int = DEFAULT_KEEP_TURNS,
+                 fold_batch: int = DEFAULT_FOLD_BATCH, summary_token_budget: int = DEFAULT_SUMMARY_TOKEN_BUDGET):
+        self.token_budget = token_budget
+        self.keep_turns = keep_turns
+        self.fold_batch = fold_batch
+        self.summary_token_budget = min(summary_token_budget, token_budget // 2)
+        self.summary = ""
+        self.turns: List[Tuple[str, str]] = []
+        self.folded_turns = 0
+        self._summary_chain = None
+        self.set_llm(llm)
+
+    def set_llm(self, llm):
+        # Lets the UI create the memory before the LLM is loaded.
+        if llm is not None and self._summary_chain is None:
+            self._summary_chain = ChatPromptTemplate.from_template(SUMMARY_PROMPT_TEMPLATE) | llm | StrOutputParser()
+
+    def add_turn(self, question: str, answer: str):
+        self.turns.append((question, answer or ""))
+        if len(self.turns) >= self.keep_turns + self.fold_batch:
+            self._fold(self.turns[:self.fold_batch])
+            self.turns = self.turns[self.fold_batch:]
+
+    def _fold(self, turns: List[Tuple[str, str]]):
+        new_lines = "\n".join(format_turn(question, answer) for question, answer in turns)
+        summary = None
+        if self._summary_chain is not None:
+            try:
+                summary = self._summary_chain.invoke({
+                    "summary": self.summary or "(empty)",
+                    "new_lines": new_lines,
+                    "max_words": int(self.summary_token_budget * 0.75),
+                }).strip()
+            except Exception as e:
+                print(f"Memory summarization failed, keeping an extractive summary: {e}")
+        if not summary:
+            # Extractive fallback: remember what was asked, newest last.
+            asked = "; ".join(question for question, _ in turns)
+            summary = f"{self.summary} Earlier the user asked: {asked}.".strip()
+            summary = summary[-self.summary_token_budget * CHARS_PER_TOKEN:]
+        self.summary = truncate_to_tokens(summary, self.summary_token_budget)
+        self.folded_turns += len(turns)
+
+    def as_messages(self) -> List[BaseMessage]:
+        messages: List[BaseMessage] = []
+        remaining = self.token_budget
+        if self.summary:
+            messages.append(SystemMessage(content=self.summary))
+            remaining -= estimate_tokens(self.summary)
+        recent: List[BaseMessage] = []
+        # Newest turns first, so whatever is cut to fit the budget is the oldest.
+        for question, answer in reversed(self.turns):
+            if remaining <= 0:
+                break
+            answer_text = truncate_to_tokens(answer, max(remaining - estimate_tokens(question), 0))
+            remaining -= estimate_tokens(question) + estimate_tokens(answer_text)
+            if remaining < 0:
+                break
+            recent[:0] = [HumanMessage(content=question), AIMessage(content=answer_text)]
+        return messages + recent
+
+    def prompt_tokens(self) -> int:
+        return sum(estimate_tokens(message.content) for message in self.as_messages())
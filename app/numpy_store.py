@@ -0,0 +1,99 @@
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+EMBEDDINGS_FILE = 'embeddings.npy'
+SCALES_FILE = 'scales.npy'
+DOCUMENTS_FILE = 'documents.json'
+SUPPORTED_DTYPES = ("float16", "int8")
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+# Brute-force cosine search over a memory-mapped matrix of normalized embeddings.
+# float16 halves the float32 footprint; int8 quarters it, with one float32 scale
+# per row. A query (or a batch of queries) is a single matmul plus argpartition.
+class NumpyVectorStore:
+    def __init__(self, matrix: np.ndarray, scales: Optional[np.ndarray], texts: List[str],
+                 metadatas: List[Dict[str, Any]], index_version: Optional[str] = None):
+        self.matrix = matrix
+        self.scales = scales
+        self.texts = texts
+        self.metadatas = metadatas
+        self.index_version = index_version
+
+    @staticmethod
+    def build(directory: str, embeddings: np.ndarray, texts: List[str], metadatas: List[Dict[str, Any]],
+              dtype: str = "float16", index_version: Optional[str] = None):
+        if dtype not in SUPPORTED_DTYPES:
+            raise ValueError(f"Unsupported dtype '{dtype}', expected one of {SUPPORTED_DTYPES}")
+        os.makedirs(directory, exist_ok=True)
+        vectors = normalize_rows(embeddings)
+        scales_path = os.path.join(directory, SCALES_FILE)
+        if dtype == "int8":
+            scales = np.maximum(np.abs(vectors).max(axis=1), 1e-12) / 127.0
+            matrix = np.round(vectors / scales[:, None]).astype(np.int8)
+            np.save(scales_path, scales.astype(np.float32))
+        else:
+            matrix = vectors.astype(np.float16)
+            if os.path.exists(scales_path):
+                os.remove(scales_path)
+        np.save(os.path.join(directory, EMBEDDINGS_FILE), matrix)
+        with open(os.path.join(directory, DOCUMENTS_FILE), 'w', encoding='utf-8') as f:
+            json.dump({"dtype": dtype, "index_version": index_version, "texts": texts, "metadatas": metadatas}, f)
+
+    @classmethod
+    def load(cls, directory: str) -> "NumpyVectorStore":
+        with open(os.path.join(directory, DOCUMENTS_FILE), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        matrix = np.load(os.path.join(directory, EMBEDDINGS_FILE), mmap_mode='r')
+        scales = None
+        if data["dtype"] == "int8":
+            scales = np.load(os.path.join(directory, SCALES_FILE))
+        return cls(matrix, scales, data["texts"], data["metadatas"], index_version=data.get("index_version"))
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        # queries: (d,) or (n, d). Returns (n, k) indices and cosine scores, best first.
+        queries = normalize_rows(np.atleast_2d(queries))
+        scores = np.matmul(self.matrix, queries.T, dtype=np.float32).T
+        if self.scales is not None:
+            scores *= self.scales[None, :]
+        k = min(k, scores.shape[1])
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+    def document(self, index: int, score: Optional[float] = None) -> Document:
+        metadata = dict(self.metadatas[index])
+        if score is not None:
+            metadata["score"] = float(score)
+        return Document(page_content=self.texts[index], metadata=metadata)
+
+
+class NumpyRetriever(BaseRetriever):
+    store: Any
+    embeddings: Any
+    k: int = 3
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return self.batch_search([query])[0]
+
+    def batch_search(self, queries: List[str]) -> List[List[Document]]:
+        # One encoder call and one matmul for the whole batch.
+        vectors = np.asarray(self.embeddings.embed_documents(queries), dtype=np.float32)
+        indices, scores = self.store.search(vectors, self.k)
+        return [[self.store.document(int(i), s) for i, s in zip(row_indices, row_scores)]
+                for row_indices, row_scores in zip(indices, scores)]
@@ -0,0 +1,80 @@
+import os
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+MODEL_FILE = 'model.onnx'
+QUANTIZED_MODEL_FILE = 'model_int8.onnx'
+TOKENIZER_FILE = 'tokenizer.json'
+DEFAULT_MAX_LENGTH = 256
+DEFAULT_BATCH_SIZE = 32
+
+
+# all-MiniLM-L6-v2 on onnxruntime: only the `tokenizers` package and an ONNX
+# session are loaded, no torch or transformers. The export covers the transformer
+# only; mean pooling over the attention mask and L2 normalization (the model's
+# Normalize module) reproduce the sentence-transformers output, so vectors from
+# both backends share an index (see export_onnx_embeddings.py).
+class OnnxEmbeddings(Embeddings):
+    def __init__(self, model_dir: str, quantized: bool = False, normalize: bool = True,
+                 max_length: int = DEFAULT_MAX_LENGTH, batch_size: int = DEFAULT_BATCH_SIZE,
+                 num_threads: Optional[int] = None):
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        model_path = os.path.join(model_dir, QUANTIZED_MODEL_FILE if quantized else MODEL_FILE)
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"ONNX model '{model_path}' not found; run scripts/export_onnx_embeddings.py first.")
+        options = onnxruntime.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = onnxruntime.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.no_padding()
+        self.pad_id = self.tokenizer.token_to_id("[PAD]") or 0
+        self.normalize = normalize
+        self.batch_size = batch_size
+
+    def _run(self, input_ids: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+        token_embeddings = self.session.run(None, feeds)[0]
+        mask = attention_mask[:, :, None].astype(np.float32)
+        vectors = (token_embeddings * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+        if self.normalize:
+            vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return vectors
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        max_len = max(len(encoding.ids) for encoding in encodings)
+        input_ids = np.full((len(encodings), max_len), self.pad_id, dtype=np.int64)
+        attention_mask = np.zeros((len(encodings), max_len), dtype=np.int64)
+        for row, encoding in enumerate(encodings):
+            input_ids[row, :len(encoding.ids)] = encoding.ids
+            attention_mask[row, :len(encoding.ids)] = 1
+        return self._run(input_ids, attention_mask)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        # Sorting by length keeps padding inside each batch small.
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors = np.zeros((len(texts), 0), dtype=np.float32)
+        for start in range(0, len(order), self.batch_size):
+            batch_indices = order[start:start + self.batch_size]
+            batch_vectors = self._embed_batch([texts[i] for i in batch_indices])
+            if vectors.shape[1] == 0:
+                vectors = np.zeros((len(texts), batch_vectors.shape[1]), dtype=np.float32)
+            vectors[batch_indices] = batch_vectors
+        return vectors.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        # Single query: no padding, no batching, one session run.
+        encoding = self.tokenizer.encode(text)
+        input_ids = np.asarray([encoding.ids], dtype=np.int64)
+        return self._run(input_ids, np.ones_like(input_ids))[0].tolist()
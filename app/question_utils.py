@@ -0,0 +1,18 @@
+import re
+
+# Words that usually point back at something said earlier in the conversation.
+CONTEXT_REFERENCE_WORDS = {
+    "he", "she", "him", "her", "his", "hers", "they", "them", "their", "theirs",
+    "it", "its", "this", "that", "these", "those", "same", "above", "previous",
+}
+
+
+def normalize_question(question: str) -> str:
+    question = question.lower().strip()
+    question = re.sub(r"[^\w\s]", " ", question)
+    return " ".join(question.split())
+
+
+def is_context_dependent(question: str) -> bool:
+    words = normalize_question(question).split()
+    return any(word in CONTEXT_REFERENCE_WORDS for word in words)
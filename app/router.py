@@ -0,0 +1,148 @@
+import csv
+import threading
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from question_utils import is_context_dependent
+
+ROUTES = ("sql", "rag", "general")
+DEFAULT_THRESHOLD = 0.8
+DEFAULT_MIN_SIMILARITY = 0.45
+DEFAULT_K = 5
+
+# Extra labeled questions so every route has neighbours beyond the evaluation set.
+SEED_EXAMPLES = [
+    ("List all cardiologists.", "sql"),
+    ("Which doctors work at Mayo Clinic?", "sql"),
+    ("How many doctors are in the database?", "sql"),
+    ("What is the address of Stanford Health Care?", "sql"),
+    ("Is Johns Hopkins Hospital a public institution?", "sql"),
+    ("Show me neurologists interested in Diabetes.", "sql"),
+    ("Which institutions are private?", "sql"),
+    ("Find a pediatrician at UCLA Medical Center.", "sql"),
+    ("What causes anemia?", "rag"),
+    ("What are the symptoms of asthma?", "rag"),
+    ("How is high blood pressure treated?", "rag"),
+    ("How can I prevent the flu?", "rag"),
+    ("What is Alzheimer's disease?", "rag"),
+    ("Is acne contagious?", "rag"),
+    ("What are the side effects of antibiotics?", "rag"),
+    ("Hello!", "general"),
+    ("Good morning.", "general"),
+    ("What can you do?", "general"),
+    ("Who are you?", "general"),
+    ("What's the weather like today?", "general"),
+    ("Goodbye.", "general"),
+]
+
+SQL_KEYWORDS = ("doctor", "institution", "clinic", "hospital")
+RAG_KEYWORDS = ("symptom", "disease", "treatment", "cause")
+
+
+def keyword_route(question: str) -> str:
+    question_lower = question.lower()
+    if any(keyword in question_lower for keyword in SQL_KEYWORDS):
+        return "sql"
+    if any(keyword in question_lower for keyword in RAG_KEYWORDS):
+        return "rag"
+    return "general"
+
+
+def load_labeled_examples(dataset_path: str) -> List[Tuple[str, str]]:
+    examples = []
+    try:
+        with open(dataset_path, 'r', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                question = (row.get("Input Question") or "").strip()
+                label = (row.get("Expected Classification") or "").strip().lower()
+                # Follow-ups only make sense with their history, so they are poor neighbours.
+                if question and label in ROUTES and not is_context_dependent(question):
+                    examples.append((question, label))
+    except IOError as e:
+        print(f"Router: could not read labeled examples from {dataset_path}: {e}")
+    return examples
+
+
+# kNN over embedded labeled questions. route() returns None whenever the
+# neighbours disagree, so the caller can fall back to the LLM classifier.
+class QuestionRouter:
+    def __init__(self, embeddings, examples: List[Tuple[str, str]], threshold: float = DEFAULT_THRESHOLD,
+                 min_similarity: float = DEFAULT_MIN_SIMILARITY, k: int = DEFAULT_K):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.min_similarity = min_similarity
+        self.k = k
+        self.labels = [label for _, label in examples]
+        self.questions = [question for question, _ in examples]
+        self.stats = {"local": 0, "llm": 0, "local_sql": 0, "local_rag": 0, "local_general": 0}
+        self._lock = threading.Lock()
+        vectors = np.asarray(embeddings.embed_documents(self.questions), dtype=np.float32)
+        self._matrix = self._normalize(vectors)
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def _score(self, similarities: np.ndarray) -> Tuple[str, float]:
+        k = min(self.k, len(similarities))
+        top = np.argpartition(-similarities, k - 1)[:k]
+        scores = {route: 0.0 for route in ROUTES}
+        for index in top:
+            scores[self.labels[index]] += max(float(similarities[index]), 0.0)
+        label = max(scores, key=scores.get)
+        total = sum(scores.values())
+        confidence = scores[label] / total if total > 0 else 0.0
+        if float(similarities[top].max()) < self.min_similarity:
+            confidence = 0.0
+        return label, confidence
+
+    def predict(self, question: str) -> Tuple[str, float]:
+        query = self._normalize(np.asarray(self.embeddings.embed_query(question), dtype=np.float32))
+        return self._score(self._matrix @ query)
+
+    def predict_batch(self, questions: List[str]) -> List[Tuple[str, float]]:
+        # One encoder call and one matmul for all questions.
+        queries = self._normalize(np.asarray(self.embeddings.embed_documents(questions), dtype=np.float32))
+        return [self._score(row) for row in queries @ self._matrix.T]
+
+    def _decide(self, question: str, label: str, confidence: float) -> Tuple[Optional[str], float]:
+        keyword_label = keyword_route(question)
+        # A keyword hit that agrees with the neighbours is accepted with a slightly lower bar.
+        threshold = self.threshold - 0.1 if keyword_label == label and keyword_label != "general" else self.threshold
+        if confidence >= threshold:
+            self._count(label)
+            return label, confidence
+        self._count(None)
+        return None, confidence
+
+    def route(self, question: str) -> Tuple[Optional[str], float]:
+        if is_context_dependent(question) or not self.questions:
+            self._count(None)
+            return None, 0.0
+        label, confidence = self.predict(question)
+        return self._decide(question, label, confidence)
+
+    def route_batch(self, questions: List[str]) -> List[Tuple[Optional[str], float]]:
+        results = [(None, 0.0)] * len(questions)
+        eligible = [i for i, question in enumerate(questions) if self.questions and not is_context_dependent(question)]
+        for i in set(range(len(questions))) - set(eligible):
+            self._count(None)
+        if eligible:
+            predictions = self.predict_batch([questions[i] for i in eligible])
+            for i, (label, confidence) in zip(eligible, predictions):
+                results[i] = self._decide(questions[i], label, confidence)
+        return results
+
+    def _count(self, label: Optional[str]):
+        with self._lock:
+            if label is None:
+                self.stats["llm"] += 1
+            else:
+                self.stats["local"] += 1
+                self.stats[f"local_{label}"] += 1
+
+    def short_circuit_rate(self) -> float:
+        total = self.stats["local"] + self.stats["llm"]
+        return self.stats["local"] / total if total else 0.0
@@ -0,0 +1,84 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+DEFAULT_WORKERS = 4
+DEFAULT_TIMEOUT_SECONDS = 2.0
+
+
+class SpeculativeTask:
+    def __init__(self, branch: str, future, release: Callable[[], None]):
+        self.branch = branch
+        self.future = future
+        self.started_at = time.perf_counter()
+        self.future.add_done_callback(lambda _: release())
+
+    def result(self, timeout: float) -> Tuple[Any, float]:
+        # Returns (value, seconds the branch ran); raises if it failed or is not done in time.
+        return self.future.result(timeout=timeout)
+
+    def discard(self) -> bool:
+        # A task that has not started yet is cancelled; a running one finishes and is ignored.
+        return self.future.cancel()
+
+
+# Runs cheap, side-effect free work (retrieval) on a small pool while the graph waits
+# on an LLM call. At most `workers` tasks are in flight: when the pool is busy start()
+# returns None and the caller takes the normal, sequential path, so speculation can
+# never queue up behind real work under load.
+class Speculator:
+    def __init__(self, workers: int = DEFAULT_WORKERS, timeout_seconds: float = DEFAULT_TIMEOUT_SECONDS):
+        self.timeout_seconds = timeout_seconds
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="medibot-speculate")
+        self._slots = threading.BoundedSemaphore(workers)
+        self._stats_lock = threading.Lock()
+        self.stats = {"started": 0, "skipped": 0, "used": 0, "discarded": 0, "cancelled": 0, "failed": 0}
+
+    def _count(self, outcome: str):
+        with self._stats_lock:
+            self.stats[outcome] += 1
+
+    def start(self, branch: str, fn: Callable[..., Any], *args) -> Optional[SpeculativeTask]:
+        if not self._slots.acquire(blocking=False):
+            self._count("skipped")
+            return None
+
+        def timed():
+            start_time = time.perf_counter()
+            return fn(*args), time.perf_counter() - start_time
+
+        try:
+            future = self._pool.submit(timed)
+        except RuntimeError:
+            # The pool is shut down at interpreter exit.
+            self._slots.release()
+            self._count("skipped")
+            return None
+        self._count("started")
+        return SpeculativeTask(branch, future, self._slots.release)
+
+    def collect(self, task: SpeculativeTask) -> Tuple[Optional[Any], Dict[str, Any]]:
+        # For a branch the route needs. The value is None when it failed or timed out,
+        # and the caller then does the work itself.
+        timing = {"branch": task.branch, "outcome": "used", "branch_seconds": None,
+                  "waited_seconds": None}
+        wait_start = time.perf_counter()
+        try:
+            value, timing["branch_seconds"] = task.result(self.timeout_seconds)
+        except Exception as e:
+            print(f"Speculative {task.branch} not usable: {e!r}")
+            task.discard()
+            value, timing["outcome"] = None, "failed"
+        timing["waited_seconds"] = time.perf_counter() - wait_start
+        self._count(timing["outcome"])
+        return value, timing
+
+    def abandon(self, task: SpeculativeTask) -> Dict[str, Any]:
+        # For a branch the route does not need.
+        outcome = "cancelled" if task.discard() else "discarded"
+        self._count(outcome)
+        return {"branch": task.branch, "outcome": outcome, "branch_seconds": None, "waited_seconds": 0.0}
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
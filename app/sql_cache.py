@@ -0,0 +1,132 @@
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from sqlalchemy import text
+
+from question_utils import normalize_question
+
+DATA_VERSION_TABLE = "medibot_data_version"
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_VERSION_CHECK_SECONDS = 5.0
+# Single-quoted literals and double-quoted identifiers are case sensitive and kept as written.
+QUOTED_SQL = re.compile(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\")")
+
+
+def normalize_sql(sql_query: str) -> str:
+    parts = QUOTED_SQL.split(sql_query.strip().rstrip(';'))
+    normalized = [part if index % 2 else " ".join(part.lower().split()) for index, part in enumerate(parts)]
+    return "".join(normalized).strip()
+
+
+def read_data_version(connection) -> Optional[int]:
+    # The stamp is bumped by data/sql_setup/insert_data.py and every migration.
+    try:
+        return connection.execute(text(f"SELECT version FROM {DATA_VERSION_TABLE}")).scalar()
+    except Exception:
+        connection.rollback()
+        return None
+
+
+class LRUCache:
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            if key not in self._entries:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return self._entries[key]
+
+    def put(self, key: str, value: Any):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Two in-process caches for the SQL path: normalized question -> SQL that executed
+# successfully, and normalized SQL plus bound parameters -> formatted result. Both are
+# emptied when the data-version stamp in the database changes. The stamp is re-read at most every
+# version_check_seconds, so a hit normally costs no database round trip, and a
+# cached result is never more than that many seconds behind a data load.
+class SQLCache:
+    def __init__(self, engine, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 version_check_seconds: float = DEFAULT_VERSION_CHECK_SECONDS):
+        self.engine = engine
+        self.version_check_seconds = version_check_seconds
+        self.queries = LRUCache(max_entries)
+        self.results = LRUCache(max_entries)
+        self.data_version = None
+        self._version_known = False
+        self.invalidations = 0
+        self._checked_at = 0.0
+        self._version_lock = threading.Lock()
+
+    def _check_version(self):
+        with self._version_lock:
+            now = time.monotonic()
+            if now - self._checked_at < self.version_check_seconds:
+                return
+            self._checked_at = now
+            try:
+                with self.engine.connect() as connection:
+                    version = read_data_version(connection)
+            except Exception as e:
+                print(f"SQL cache: could not read the data version: {e}")
+                return
+            if self._version_known and version != self.data_version:
+                print(f"SQL cache: data version changed ({self.data_version} -> {version}), clearing.")
+                self.invalidations += 1
+                self.clear()
+            self.data_version = version
+            self._version_known = True
+
+    def get_sql(self, question: str) -> Optional[str]:
+        self._check_version()
+        return self.queries.get(normalize_question(question))
+
+    def put_sql(self, question: str, sql_query: str):
+        self.queries.put(normalize_question(question), sql_query)
+
+    @staticmethod
+    def _result_key(sql_query: str, params: Optional[Dict[str, Any]]) -> str:
+        key = normalize_sql(sql_query)
+        return f"{key}\n{json.dumps(params, sort_keys=True, default=str)}" if params else key
+
+    def get_result(self, sql_query: str, params: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        self._check_version()
+        return self.results.get(self._result_key(sql_query, params))
+
+    def put_result(self, sql_query: str, result: str, params: Optional[Dict[str, Any]] = None):
+        self.results.put(self._result_key(sql_query, params), result)
+
+    def clear(self):
+        self.queries.clear()
+        self.results.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "data_version": self.data_version,
+            "invalidations": self.invalidations,
+            "sql": dict(self.queries.stats, entries=len(self.queries)),
+            "results": dict(self.results.stats, entries=len(self.results)),
+        }
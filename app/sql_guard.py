@@ -0,0 +1,190 @@
+import json
+import re
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+DEFAULT_MAX_ROWS = 11
+DEFAULT_STATEMENT_TIMEOUT_MS = 5000
+DEFAULT_MAX_COST = 100000.0
+SQLITE_PROGRESS_STEPS = 1000
+
+# One SQL token per match, in the order they have to be recognised: literals and
+# comments first, so "WHERE notes = 'drop table'" is never read as keywords.
+SQL_TOKEN = re.compile(
+    r"(?P<literal>'(?:[^']|'')*'|\$(?:[A-Za-z_]\w*)?\$.*?\$(?:[A-Za-z_]\w*)?\$)"
+    r"|(?P<comment>--[^\n]*|/\*.*?\*/)"
+    r"|(?P<identifier>\"(?:[^\"]|\"\")*\")"
+    r"|(?P<word>[A-Za-z_][A-Za-z0-9_$]*)"
+    r"|(?P<symbol>\S)",
+    re.DOTALL,
+)
+READ_ONLY_STARTS = ("select", "with")
+# Statements a query starting with WITH can still run, inside a CTE body
+# (WITH gone AS (DELETE ...) SELECT ...) or as the main statement after the CTE list
+# (WITH x AS (SELECT 1) UPDATE ...). They are rejected at any unquoted position.
+DATA_MODIFYING_KEYWORDS = {"insert", "update", "delete", "merge"}
+# FOR UPDATE / FOR NO KEY UPDATE / FOR SHARE / FOR KEY SHARE take row locks.
+ROW_LOCK_WORDS = {"update", "no", "key", "share"}
+# Read-only in name but not in effect: sleeping, file access, other sessions, sequences.
+FORBIDDEN_FUNCTIONS = {
+    "pg_sleep", "pg_sleep_for", "pg_sleep_until", "pg_read_file", "pg_read_binary_file", "pg_ls_dir",
+    "pg_stat_file", "lo_import", "lo_export", "lo_unlink", "dblink", "dblink_exec", "pg_terminate_backend",
+    "pg_cancel_backend", "pg_reload_conf", "set_config", "nextval", "setval", "load_extension",
+}
+
+
+class SQLGuardError(ValueError):
+    pass
+
+
+def _tokens(sql_query: str) -> List[Tuple[str, str]]:
+    # (kind, value) pairs without comments; bare words are lowercased, quoted
+    # identifiers are unquoted but keep their own kind, so a column called "into"
+    # is not the INTO keyword while "pg_sleep"(5) is still a call to pg_sleep.
+    tokens = []
+    for match in SQL_TOKEN.finditer(sql_query):
+        kind, value = match.lastgroup, match.group(0)
+        if kind == "comment":
+            continue
+        if kind == "word":
+            value = value.lower()
+        elif kind == "identifier":
+            value = value[1:-1].replace('""', '"')
+        tokens.append((kind, value))
+    return tokens
+
+
+def check_read_only(sql_query: str) -> str:
+    # Returns the statement without a trailing semicolon, or raises SQLGuardError.
+    # Keywords only count where they act as keywords, so columns or aliases named
+    # comment, set, lock or analyze are fine.
+    statement = sql_query.strip().rstrip(';').strip()
+    tokens = _tokens(statement)
+    while tokens and tokens[-1] == ("symbol", ";"):
+        tokens.pop()
+    if not tokens:
+        raise SQLGuardError("The SQL query is empty.")
+    if ("symbol", ";") in tokens:
+        raise SQLGuardError("Only a single SQL statement is allowed.")
+    words = [(index, value) for index, (kind, value) in enumerate(tokens) if kind == "word"]
+    if not words or words[0][1] not in READ_ONLY_STARTS:
+        raise SQLGuardError("Only SELECT queries are allowed.")
+
+    forbidden = set()
+    for index, (kind, value) in enumerate(tokens):
+        if kind != "word":
+            continue
+        following = tokens[index + 1] if index + 1 < len(tokens) else None
+        if value in DATA_MODIFYING_KEYWORDS:
+            forbidden.add(value)
+        elif value == "into":
+            # SELECT ... INTO creates a table; INTO is reserved, so it is never a bare column name.
+            forbidden.add(value)
+        elif value == "for" and following and following[0] == "word" and following[1] in ROW_LOCK_WORDS:
+            forbidden.add(f"for {following[1]}")
+    if forbidden:
+        raise SQLGuardError(f"The SQL query uses a statement that is not read-only: {', '.join(sorted(forbidden)).upper()}.")
+    functions = sorted({value.lower() for index, (kind, value) in enumerate(tokens[:-1])
+                        if kind in ("word", "identifier") and tokens[index + 1] == ("symbol", "(")
+                        and value.lower() in FORBIDDEN_FUNCTIONS})
+    if functions:
+        raise SQLGuardError(f"The SQL query calls a function that is not allowed: {', '.join(functions)}.")
+    return statement
+
+
+def limit_rows(sql_query: str, max_rows: int) -> str:
+    # Wrapping keeps the query's own LIMIT/ORDER BY intact and works for WITH queries too.
+    return f"SELECT * FROM ({sql_query}) AS guarded_query LIMIT {int(max_rows)}"
+
+
+def _plan_cost(plan: Any) -> Optional[float]:
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    try:
+        return float(plan[0]["Plan"]["Total Cost"])
+    except (LookupError, TypeError, ValueError):
+        return None
+
+
+# Runs LLM-written SQL defensively: a static read-only check, an automatic row limit,
+# a read-only transaction with a statement timeout and, on Postgres, a pre-flight
+# EXPLAIN whose total cost has to stay under max_cost. SQLite (the local stand-in)
+# gets query_only mode and a progress-handler deadline; it has no cost estimates, so
+# the plan check is skipped there.
+class SQLGuard:
+    def __init__(self, max_rows: int = DEFAULT_MAX_ROWS, statement_timeout_ms: int = DEFAULT_STATEMENT_TIMEOUT_MS,
+                 max_cost: Optional[float] = DEFAULT_MAX_COST):
+        self.max_rows = max_rows
+        self.statement_timeout_ms = statement_timeout_ms
+        self.max_cost = max_cost
+        self.stats = {"executed": 0, "rejected": 0, "timeouts": 0}
+
+    def prepare(self, sql_query: str) -> str:
+        try:
+            return limit_rows(check_read_only(sql_query), self.max_rows)
+        except SQLGuardError:
+            self.stats["rejected"] += 1
+            raise
+
+    def estimate_cost(self, connection, sql_query: str, params: Optional[Dict[str, Any]] = None) -> Optional[float]:
+        if connection.dialect.name != "postgresql":
+            return None
+        return _plan_cost(connection.execute(text(f"EXPLAIN (FORMAT JSON) {sql_query}"), params or {}).scalar())
+
+    def execute(self, connection, sql_query: str,
+                params: Optional[Dict[str, Any]] = None) -> Tuple[Optional[List[str]], List[tuple]]:
+        # Returns (columns, rows), at most max_rows rows. Any open transaction on the
+        # connection is committed first so the guarded one starts clean.
+        guarded_query = self.prepare(sql_query)
+        if connection.in_transaction():
+            connection.commit()
+        dialect = connection.dialect.name
+        try:
+            with connection.begin():
+                if dialect == "postgresql":
+                    connection.exec_driver_sql("SET TRANSACTION READ ONLY")
+                    connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(self.statement_timeout_ms)}")
+                    cost = self.estimate_cost(connection, guarded_query, params)
+                    if self.max_cost is not None and cost is not None and cost > self.max_cost:
+                        self.stats["rejected"] += 1
+                        raise SQLGuardError(f"The SQL query is too expensive to run (estimated cost {cost:.0f}, "
+                                            f"limit {self.max_cost:.0f}); it needs a narrower filter.")
+                    return self._fetch(connection, guarded_query, params)
+                if dialect == "sqlite":
+                    return self._fetch_sqlite(connection, guarded_query, params)
+                return self._fetch(connection, guarded_query, params)
+        except SQLGuardError:
+            raise
+        except Exception as e:
+            if _is_timeout(e):
+                self.stats["timeouts"] += 1
+                raise SQLGuardError(f"The SQL query took longer than {self.statement_timeout_ms} ms and was stopped.") from e
+            raise
+
+    def _fetch(self, connection, sql_query: str, params: Optional[Dict[str, Any]]):
+        result_proxy = connection.execute(text(sql_query), params or {})
+        if not result_proxy.returns_rows:
+            return None, []
+        columns = list(result_proxy.keys())
+        rows = [tuple(row) for row in result_proxy.fetchall()]
+        self.stats["executed"] += 1
+        return columns, rows
+
+    def _fetch_sqlite(self, connection, sql_query: str, params: Optional[Dict[str, Any]]):
+        driver_connection = connection.connection.driver_connection
+        deadline = time.monotonic() + self.statement_timeout_ms / 1000.0
+        connection.exec_driver_sql("PRAGMA query_only = ON")
+        # A non-zero return from the handler aborts the running statement.
+        driver_connection.set_progress_handler(lambda: int(time.monotonic() > deadline), SQLITE_PROGRESS_STEPS)
+        try:
+            return self._fetch(connection, sql_query, params)
+        finally:
+            driver_connection.set_progress_handler(None, SQLITE_PROGRESS_STEPS)
+            connection.exec_driver_sql("PRAGMA query_only = OFF")
+
+
+def _is_timeout(error: Exception) -> bool:
+    message = str(error).lower()
+    return "statement timeout" in message or "canceling statement" in message or "interrupted" in message
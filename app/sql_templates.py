@@ -0,0 +1,263 @@
+import re
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import bindparam, text
+
+from question_utils import is_context_dependent, normalize_question
+from sql_cache import read_data_version
+
+DEFAULT_REFRESH_SECONDS = 60.0
+# Specializations and fields of interest are small enumerations kept in memory;
+# a table with more distinct values than this disables the templates.
+MAX_VOCABULARY = 1000
+# Longest doctor / institution name, in words, looked up in the database.
+MAX_DOCTOR_NAME_WORDS = 4
+MAX_INSTITUTION_NAME_WORDS = 6
+# Longer questions are left to the LLM instead of looking up hundreds of phrases.
+MAX_QUESTION_WORDS = 40
+
+# Parameterized queries for the common SQL intents. Values are always bound,
+# never formatted into the SQL text. The lower() lookups match the expression
+# indexes in data/sql_setup/migrations/003_doctor_search_indexes.sql.
+SQL_TEMPLATES = {
+    "doctors_by_specialization":
+        "SELECT doctor_name, specialization FROM doctors WHERE lower(specialization) = lower(:specialization)",
+    "count_doctors_by_specialization":
+        "SELECT COUNT(*) AS doctor_count FROM doctors WHERE lower(specialization) = lower(:specialization)",
+    "doctors_by_interest":
+        "SELECT doctor_name, specialization, field_of_interest FROM doctors "
+        "WHERE lower(field_of_interest) = lower(:field_of_interest)",
+    "doctors_by_specialization_and_interest":
+        "SELECT doctor_name, specialization, field_of_interest FROM doctors "
+        "WHERE lower(specialization) = lower(:specialization) AND lower(field_of_interest) = lower(:field_of_interest)",
+    "doctors_at_institution":
+        "SELECT d.doctor_name, d.specialization FROM doctors d JOIN institutions i ON d.institution_id = i.id "
+        "WHERE i.institution_name = :institution_name",
+    "count_doctors_at_institution":
+        "SELECT COUNT(*) AS doctor_count FROM doctors d JOIN institutions i ON d.institution_id = i.id "
+        "WHERE i.institution_name = :institution_name",
+    "doctors_by_specialization_at_institution":
+        "SELECT d.doctor_name, d.specialization, i.institution_name FROM doctors d "
+        "JOIN institutions i ON d.institution_id = i.id "
+        "WHERE lower(d.specialization) = lower(:specialization) AND i.institution_name = :institution_name",
+    "institution_type":
+        "SELECT institution_name, institution_type FROM institutions WHERE institution_name = :institution_name",
+    "institution_address":
+        "SELECT institution_name, institution_address FROM institutions WHERE institution_name = :institution_name",
+    "count_doctors":
+        "SELECT COUNT(*) AS doctor_count FROM doctors",
+}
+# Names are checked against the tables per question instead of being loaded; both
+# lookups use the lower() indexes from data/sql_setup/migrations/004_name_lookup_indexes.sql.
+DOCTOR_NAME_LOOKUP = text(
+    "SELECT doctor_name FROM doctors WHERE lower(doctor_name) IN :names LIMIT 1"
+).bindparams(bindparam("names", expanding=True))
+INSTITUTION_NAME_LOOKUP = text(
+    "SELECT institution_name FROM institutions WHERE lower(institution_name) IN :names"
+).bindparams(bindparam("names", expanding=True))
+
+# How people name the specialists; the specializations themselves come from the table.
+SPECIALIZATION_ALIASES = {
+    "Cardiology": ("cardiologist", "cardiac"),
+    "Dermatology": ("dermatologist",),
+    "Gynecology": ("gynecologist", "gynaecologist", "gynecological"),
+    "Internal Medicine": ("internist",),
+    "Neurology": ("neurologist",),
+    "Ophthalmology": ("ophthalmologist", "eye doctor"),
+    "Orthopedics": ("orthopedist", "orthopedic", "orthopaedic"),
+    "Pediatrics": ("pediatrician", "paediatrician", "pediatric"),
+    "Psychiatry": ("psychiatrist",),
+    "Surgery": ("surgeon",),
+}
+# Trailing words that may be left out of an institution name ("Mayo" for "Mayo Clinic").
+INSTITUTION_SUFFIXES = ("hospital", "medical center", "clinic", "health care")
+
+COUNT_PATTERN = re.compile(r"\b(how many|number of|count)\b")
+ADDRESS_PATTERN = re.compile(r"\b(address|located|location|where is)\b")
+TYPE_PATTERN = re.compile(r"\b(private|public|type)\b")
+INTEREST_PATTERN = re.compile(r"\b(interest|interests|interested|focus|focuses|focused)\b")
+# Questions that ask for more than one thing are left to the LLM.
+MULTI_REQUEST_PATTERN = re.compile(r"\b(and also|as well as|tell me about|explain)\b")
+DOCTOR_PATTERN = re.compile(r"\b(doctors?|physicians?|specialists?|who works?|work at|works at|staff)\b")
+
+
+class TemplateMatch(NamedTuple):
+    name: str
+    sql: str
+    params: Dict[str, Any]
+
+
+def _phrase_pattern(variants: Dict[str, str]) -> Optional[re.Pattern]:
+    if not variants:
+        return None
+    # Longest variant first, so "internal medicine" wins over shorter overlaps.
+    alternation = "|".join(re.escape(variant) for variant in sorted(variants, key=len, reverse=True))
+    return re.compile(rf"\b({alternation})s?\b")
+
+
+def _find(pattern: Optional[re.Pattern], variants: Dict[str, str], question: str) -> List[str]:
+    if pattern is None:
+        return []
+    return sorted({variants[match.group(1)] for match in pattern.finditer(question)})
+
+
+def _candidate_phrases(question: str, min_words: int, max_words: int) -> List[str]:
+    # Word n-grams of the question, once tokenized like normalize_question and once
+    # with in-word punctuation kept, so "Cedars-Sinai" and "St. Mary's" match as stored.
+    tokenizations = {tuple(normalize_question(question).split()),
+                     tuple(word.strip('?!,;:"()') for word in question.lower().split())}
+    phrases = set()
+    for words in tokenizations:
+        for size in range(min_words, max_words + 1):
+            for start in range(len(words) - size + 1):
+                phrases.add(" ".join(words[start:start + size]))
+    phrases.discard("")
+    return sorted(phrases)
+
+
+def _contained_in(phrase: str, other: str) -> bool:
+    return phrase != other and f" {normalize_question(phrase)} " in f" {normalize_question(other)} "
+
+
+# Slot-filling matcher over the live doctors/institutions vocabulary. A match is
+# returned only when every slot is unambiguous and the intent is clear; anything
+# else (pronouns, named doctors, several values for one slot) goes to the LLM.
+# Specializations and interests are matched in memory; doctor and institution
+# names, which grow with the data, are looked up in the database per question.
+class SQLTemplateMatcher:
+    def __init__(self, engine, refresh_seconds: float = DEFAULT_REFRESH_SECONDS):
+        self.engine = engine
+        self.refresh_seconds = refresh_seconds
+        self.data_version = None
+        self.stats = {"matched": 0, "fallback": 0}
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        with self.engine.connect() as connection:
+            self.data_version = read_data_version(connection)
+            specializations = [row[0] for row in connection.execute(
+                text("SELECT DISTINCT specialization FROM doctors WHERE specialization IS NOT NULL "
+                     f"LIMIT {MAX_VOCABULARY + 1}"))]
+            interests = [row[0] for row in connection.execute(
+                text("SELECT DISTINCT field_of_interest FROM doctors WHERE field_of_interest IS NOT NULL "
+                     f"LIMIT {MAX_VOCABULARY + 1}"))]
+        if len(specializations) > MAX_VOCABULARY or len(interests) > MAX_VOCABULARY:
+            raise ValueError(f"more than {MAX_VOCABULARY} distinct specializations or fields of interest")
+
+        specialization_variants = {}
+        for specialization in specializations:
+            specialization_variants[normalize_question(specialization)] = specialization
+            for alias in SPECIALIZATION_ALIASES.get(specialization, ()):
+                specialization_variants[alias] = specialization
+        interest_variants = {normalize_question(interest): interest for interest in interests}
+
+        self.specializations = (specialization_variants, _phrase_pattern(specialization_variants))
+        self.interests = (interest_variants, _phrase_pattern(interest_variants))
+        print(f"SQL templates: {len(specializations)} specializations, {len(interests)} fields of interest "
+              f"loaded (data version {self.data_version})")
+
+    def _refresh_if_stale(self):
+        with self._lock:
+            now = time.monotonic()
+            if now - self._checked_at < self.refresh_seconds:
+                return
+            self._checked_at = now
+            try:
+                with self.engine.connect() as connection:
+                    version = read_data_version(connection)
+                if version != self.data_version:
+                    self._load()
+            except Exception as e:
+                print(f"SQL templates: could not refresh the vocabulary: {e}")
+
+    def _mentions_doctor(self, connection, question: str) -> bool:
+        phrases = _candidate_phrases(question, 2, MAX_DOCTOR_NAME_WORDS)
+        return bool(phrases) and connection.execute(DOCTOR_NAME_LOOKUP, {"names": phrases}).first() is not None
+
+    def _find_institutions(self, connection, question: str) -> List[str]:
+        phrases = _candidate_phrases(question, 1, MAX_INSTITUTION_NAME_WORDS)
+        # Each phrase as a full name, and as a short form with a suffix left out ("Mayo" for "Mayo Clinic").
+        lookups = {phrase: [phrase] + [f"{phrase} {suffix}" for suffix in INSTITUTION_SUFFIXES] for phrase in phrases}
+        names = sorted({name for variants in lookups.values() for name in variants})
+        institutions = {}
+        for row in connection.execute(INSTITUTION_NAME_LOOKUP, {"names": names}):
+            institutions.setdefault(row[0].lower(), []).append(row[0])
+        matches = {}
+        for phrase, variants in lookups.items():
+            if phrase in institutions:
+                matches[phrase] = institutions[phrase]
+            else:
+                # Only short forms that point at a single institution are usable.
+                found = [name for variant in variants[1:] for name in institutions.get(variant, [])]
+                if len(found) == 1:
+                    matches[phrase] = found
+        # "Mayo Clinic" also contains the short form "Mayo"; only the longest phrase counts.
+        return sorted({name for phrase, found in matches.items()
+                       if not any(_contained_in(phrase, other) for other in matches) for name in found})
+
+    def _template(self, name: str, **params) -> TemplateMatch:
+        return TemplateMatch(name, SQL_TEMPLATES[name], params)
+
+    def _match(self, question: str) -> Optional[TemplateMatch]:
+        if is_context_dependent(question):
+            return None
+        normalized = normalize_question(question)
+        if MULTI_REQUEST_PATTERN.search(normalized) or len(normalized.split()) > MAX_QUESTION_WORDS:
+            return None
+        with self.engine.connect() as connection:
+            if self._mentions_doctor(connection, question):
+                return None
+            institutions = self._find_institutions(connection, question)
+        specializations = _find(self.specializations[1], self.specializations[0], normalized)
+        interests = _find(self.interests[1], self.interests[0], normalized)
+        if len(specializations) > 1 or len(interests) > 1 or len(institutions) > 1:
+            return None
+        # A disease name is only a filter when the question talks about interest in it.
+        if interests and not INTEREST_PATTERN.search(normalized):
+            return None
+        specialization = specializations[0] if specializations else None
+        interest = interests[0] if interests else None
+        institution = institutions[0] if institutions else None
+        counting = bool(COUNT_PATTERN.search(normalized))
+
+        if institution and not specialization and not interest:
+            if counting:
+                return self._template("count_doctors_at_institution", institution_name=institution)
+            if ADDRESS_PATTERN.search(normalized):
+                return self._template("institution_address", institution_name=institution)
+            if TYPE_PATTERN.search(normalized):
+                return self._template("institution_type", institution_name=institution)
+            if DOCTOR_PATTERN.search(normalized):
+                return self._template("doctors_at_institution", institution_name=institution)
+            return None
+        if counting and (interest or institution):
+            return None
+        if specialization and institution and not interest:
+            return self._template("doctors_by_specialization_at_institution",
+                                  specialization=specialization, institution_name=institution)
+        if specialization and interest and not institution:
+            return self._template("doctors_by_specialization_and_interest",
+                                  specialization=specialization, field_of_interest=interest)
+        if specialization and not interest and not institution:
+            if counting:
+                return self._template("count_doctors_by_specialization", specialization=specialization)
+            return self._template("doctors_by_specialization", specialization=specialization)
+        if interest and not specialization and not institution:
+            return self._template("doctors_by_interest", field_of_interest=interest)
+        if counting and DOCTOR_PATTERN.search(normalized) and not (specialization or interest or institution):
+            return self._template("count_doctors")
+        return None
+
+    def match(self, question: str) -> Optional[TemplateMatch]:
+        self._refresh_if_stale()
+        try:
+            result = self._match(question)
+        except Exception as e:
+            print(f"SQL templates: name lookup failed, falling back to the LLM: {e}")
+            result = None
+        self.stats["matched" if result else "fallback"] += 1
+        return result
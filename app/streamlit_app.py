@@ -1,22 +1,26 @@
 import streamlit as st
 import time
 import os
-import tempfile
-import whisper
+import threading
 from audio_recorder_streamlit import audio_recorder
-from agent_setup import get_compiled_graph_app
-from gtts import gTTS
-from io import BytesIO
-import base64
-from langchain_core.messages import HumanMessage, AIMessage
+from agent_setup import get_compiled_graph_app, get_answer_cache, stream_agent_answer, initialize_agent_resources
+from memory import ConversationMemory
+from instrumentation import trace_request, mark_startup, report_startup
+from transcription import transcribe_audio_bytes
+from question_utils import is_context_dependent
+from tts import SpeechPipeline, TTSCache, TTS_CACHE_ENABLED, TTS_CACHE_DIRECTORY, load_tts_engine
 
 st.set_page_config(page_title="MediBot: Smart Health Assistant", layout="centered")
+mark_startup("imports")
+
+WARMUP_ENABLED = os.getenv('MEDIBOT_WARMUP', '0') == '1'
 
 @st.cache_resource
 
-# Load whisper
+# Load whisper (on first use; importing whisper pulls in torch)
 def load_whisper_model(model_size="base"):
     try:
+        import whisper
         is_streamlit_cloud = os.getenv('STREAMLIT_SERVER_RUNNING_ON') == 'streamlitcloud'
         effective_model_size = 'tiny' if is_streamlit_cloud and model_size in ['base', 'small'] else model_size
         model = whisper.load_model(effective_model_size)
@@ -25,35 +29,51 @@ def load_whisper_model(model_size="base"):
         st.error(f"Fatal error loading Whisper model: {e}")
         st.stop()
 
-whisper_model = load_whisper_model("base")
-
 def transcribe_audio_local(audio_bytes, model):
     if not audio_bytes or not model:
         return None
-    tmp_audio_path = None
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp_audio_file:
-            tmp_audio_file.write(audio_bytes)
-            tmp_audio_path = tmp_audio_file.name
-        result = model.transcribe(tmp_audio_path, fp16=False)
-        transcribed_text = result["text"]
-        os.remove(tmp_audio_path)
-        return transcribed_text.strip()
+        # Decoded in memory and trimmed with VAD; only speech segments reach Whisper.
+        transcribed_text = transcribe_audio_bytes(audio_bytes, model)
+        return transcribed_text.strip() or None
     except Exception as e:
         st.error(f"Error during transcription: {e}")
-        if tmp_audio_path and os.path.exists(tmp_audio_path):
-            os.remove(tmp_audio_path)
         return None
 
-def text_to_audio_gtts(text_to_speak, lang='en'):
-    if not text_to_speak: return None
-    if not any(c.isalnum() for c in text_to_speak): return None
+@st.cache_resource
+def load_tts():
+    # Engine is selected with MEDIBOT_TTS_ENGINE (gtts, espeak or silent).
+    engine = load_tts_engine()
+    cache = TTSCache(TTS_CACHE_DIRECTORY) if TTS_CACHE_ENABLED else None
+    return engine, cache
+
+# Loads the models in the background once per process, so the first question
+# does not pay for them. Off by default; enable with MEDIBOT_WARMUP=1.
+@st.cache_resource
+def start_warmup():
+    def warm_up():
+        steps = [
+            ("agent graph", get_compiled_graph_app),
+            ("answer cache", get_answer_cache),
+            ("whisper", lambda: load_whisper_model("base")),
+        ]
+        for name, step in steps:
+            try:
+                step()
+            except Exception as e:
+                print(f"Warm-up of {name} failed: {e}")
+        mark_startup("warmup_done")
+
+    thread = threading.Thread(target=warm_up, name="medibot-warmup", daemon=True)
+    thread.start()
+    return thread
+
+def start_speech_pipeline():
     try:
-        tts = gTTS(text=text_to_speak, lang=lang, slow=False)
-        audio_fp = BytesIO(); tts.write_to_fp(audio_fp); audio_fp.seek(0)
-        return audio_fp.read()
+        engine, cache = load_tts()
+        return SpeechPipeline(engine, cache)
     except Exception as e:
-        st.error(f"Error during gTTS generation: {e}")
+        st.error(f"Error starting text-to-speech: {e}")
         return None
 
 # Title 
@@ -67,6 +87,14 @@ if "messages" not in st.session_state:
         {"role": "assistant", "content": "Hello! Ask your question via text or microphone."}
     ]
 
+# Token-budgeted history passed to the agent; older turns are folded into a summary.
+# The summarizer LLM is attached on the first question, so the first render loads nothing.
+if "memory" not in st.session_state:
+    st.session_state.memory = ConversationMemory()
+
+if WARMUP_ENABLED:
+    start_warmup()
+
 if st.session_state.get("audio_playing"):
     st.components.v1.html("""
         <script>
@@ -98,7 +126,7 @@ if audio_bytes:
          st.session_state.audio_playing = True
 
     with st.spinner("Transcribing your audio..."):
-        transcribed_text = transcribe_audio_local(audio_bytes, whisper_model)
+        transcribed_text = transcribe_audio_local(audio_bytes, load_whisper_model("base"))
     if transcribed_text:
         st.write(f"Transcribed: *{transcribed_text}*")
     else:
@@ -114,61 +142,85 @@ if prompt:
     with st.chat_message("assistant"):
         message_placeholder = st.empty()
         full_response = ""
-        audio_html_placeholder = st.empty()
         audio_response_bytes = None
-
-        # thinking_msg = "Thinking..."
-        # message_placeholder.markdown(f"*{thinking_msg}*")
-
-        with st.spinner("Thinking..."):
-            try:
-                agent_app = get_compiled_graph_app()
-                if agent_app:
-
-                    history_for_agent_dicts = st.session_state.messages[:-1]
-                    formatted_history_for_agent = []
-                    for msg in history_for_agent_dicts:
-                        if msg["role"] == "user":
-                            formatted_history_for_agent.append(HumanMessage(content=msg["content"]))
-                        elif msg["role"] == "assistant":
-                            formatted_history_for_agent.append(AIMessage(content=msg["content"]))
-
-                    inputs = {
-                        "question": prompt,
-                        "chat_history": formatted_history_for_agent
-                    }
-
-                    response_state = agent_app.invoke(inputs)
-                    full_response = response_state.get('final_answer', 'Sorry, no answer was found.')
-                else:
-                    full_response = "Agent could not be initialized."
-                    st.error(full_response)
-
-                if full_response:
-                    with st.spinner("Generating audio..."):
-                        audio_response_bytes = text_to_audio_gtts(full_response, lang='en')
-
-            except Exception as e:
-                full_response = f"Critical error: {e}"
+        # Sentences are synthesized in the background while the answer streams in.
+        speech_pipeline = start_speech_pipeline()
+
+        thinking_msg = "Thinking..."
+        message_placeholder.markdown(f"*{thinking_msg}*")
+
+        try:
+            answer_cache = get_answer_cache()
+            # Follow-up questions depend on the conversation, so they never use the cache.
+            use_cache = answer_cache is not None and not is_context_dependent(prompt)
+            cached = answer_cache.lookup(prompt) if use_cache else None
+            agent_app = get_compiled_graph_app() if not cached else None
+            if cached:
+                print(f"Answer cache hit (similarity {cached['similarity']:.3f}, route {cached['question_type']})")
+                full_response = cached["final_answer"]
+                if speech_pipeline:
+                    speech_pipeline.feed(full_response)
+            elif agent_app:
+                st.session_state.memory.set_llm(initialize_agent_resources().get('llm'))
+                inputs = {
+                    "question": prompt,
+                    "chat_history": st.session_state.memory.as_messages()
+                }
+
+                # Tokens from the answer node are shown as they arrive; the final
+                # state is the same one agent_app.invoke(inputs) would return.
+                response_state = {}
+                with trace_request(prompt) as trace:
+                    for event_type, payload in stream_agent_answer(agent_app, inputs):
+                        if event_type == "token":
+                            full_response += payload
+                            message_placeholder.markdown(full_response + "▌")
+                            if speech_pipeline:
+                                speech_pipeline.feed(payload)
+                        elif event_type == "final":
+                            response_state = payload or {}
+                    if trace is not None:
+                        trace["route"] = response_state.get("question_type")
+                streamed_response = full_response
+                full_response = response_state.get('final_answer', 'Sorry, no answer was found.')
+                if speech_pipeline and not full_response.startswith(streamed_response):
+                    # Nothing (or something else) was streamed, e.g. on an error path.
+                    speech_pipeline.feed(full_response)
+                elif speech_pipeline:
+                    speech_pipeline.feed(full_response[len(streamed_response):])
+                if use_cache and not response_state.get('error'):
+                    answer_cache.store(prompt, full_response, response_state.get('question_type'))
+            else:
+                full_response = "Agent could not be initialized."
                 st.error(full_response)
-                import traceback
-                traceback.print_exc()
+
+            if full_response:
+                message_placeholder.markdown(full_response)
+            if speech_pipeline:
+                with st.spinner("Generating audio..."):
+                    audio_response_bytes = speech_pipeline.finish()
+
+        except Exception as e:
+            full_response = f"Critical error: {e}"
+            st.error(full_response)
+            if speech_pipeline:
+                speech_pipeline.cancel()
+                audio_response_bytes = None
+            import traceback
+            traceback.print_exc()
 
         message_placeholder.markdown(full_response)
         st.session_state.messages.append({"role": "assistant", "content": full_response})
+        st.session_state.memory.add_turn(prompt, full_response)
 
         if audio_response_bytes:
             try:
-                b64 = base64.b64encode(audio_response_bytes).decode()
-                player_id = f"audio_player_{len(st.session_state.messages)}"
-                audio_html = f"""
-                    <audio id="{player_id}" controls autoplay style="width: 100%; min-height: 50px;">
-                        <source src="data:audio/mp3;base64,{b64}" type="audio/mp3">
-                        Your browser does not support the audio element.
-                    </audio>
-                    """
-                st.components.v1.html(audio_html, height=100)
+                # Served through Streamlit's media endpoint instead of an inline base64 blob.
+                st.audio(audio_response_bytes, format=f"audio/{speech_pipeline.engine.format}", autoplay=True)
                 st.session_state.audio_playing = True
-            except Exception as html_err:
-                 st.error(f"Failed to generate audio player: {html_err}")
+            except Exception as audio_err:
+                 st.error(f"Failed to generate audio player: {audio_err}")
                  st.session_state.audio_playing = False
+
+mark_startup("first_render")
+report_startup()
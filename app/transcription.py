@@ -0,0 +1,107 @@
+import io
+import wave
+from math import gcd
+from typing import List, Tuple
+
+import numpy as np
+
+WHISPER_SAMPLE_RATE = 16000
+VAD_FRAME_MS = 30
+VAD_AGGRESSIVENESS = 2
+VAD_PADDING_MS = 300
+SPLIT_SILENCE_MS = 600
+MAX_SEGMENT_SECONDS = 25
+
+
+def decode_wav_bytes(audio_bytes: bytes) -> np.ndarray:
+    # WAV bytes from the recorder -> float32 mono at 16 kHz, without touching disk.
+    with wave.open(io.BytesIO(audio_bytes), 'rb') as wav_file:
+        channels = wav_file.getnchannels()
+        sample_width = wav_file.getsampwidth()
+        sample_rate = wav_file.getframerate()
+        frames = wav_file.readframes(wav_file.getnframes())
+
+    if sample_width == 1:
+        audio = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif sample_width == 2:
+        audio = np.frombuffer(frames, dtype='<i2').astype(np.float32) / 32768.0
+    elif sample_width == 4:
+        audio = np.frombuffer(frames, dtype='<i4').astype(np.float32) / 2147483648.0
+    else:
+        raise ValueError(f"Unsupported WAV sample width: {sample_width} bytes")
+
+    if channels > 1:
+        audio = audio.reshape(-1, channels).mean(axis=1)
+    if sample_rate != WHISPER_SAMPLE_RATE:
+        from scipy.signal import resample_poly
+        divisor = gcd(sample_rate, WHISPER_SAMPLE_RATE)
+        audio = resample_poly(audio, WHISPER_SAMPLE_RATE // divisor, sample_rate // divisor).astype(np.float32)
+    return np.ascontiguousarray(audio, dtype=np.float32)
+
+
+def speech_segments(audio: np.ndarray, sample_rate: int = WHISPER_SAMPLE_RATE,
+                    aggressiveness: int = VAD_AGGRESSIVENESS) -> List[Tuple[int, int]]:
+    # Returns (start, end) sample ranges that contain speech. Leading and trailing
+    # silence is dropped, pauses of SPLIT_SILENCE_MS split segments (so they can be
+    # cut out), and no segment is longer than MAX_SEGMENT_SECONDS.
+    import webrtcvad
+
+    vad = webrtcvad.Vad(aggressiveness)
+    frame_length = sample_rate * VAD_FRAME_MS // 1000
+    pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype('<i2').tobytes()
+    frame_count = len(audio) // frame_length
+    is_speech = [vad.is_speech(pcm[i * frame_length * 2:(i + 1) * frame_length * 2], sample_rate)
+                 for i in range(frame_count)]
+
+    padding_frames = VAD_PADDING_MS // VAD_FRAME_MS
+    split_frames = SPLIT_SILENCE_MS // VAD_FRAME_MS
+    max_frames = MAX_SEGMENT_SECONDS * 1000 // VAD_FRAME_MS
+    segments = []
+    start, last_speech = None, None
+    for index, speech in enumerate(is_speech):
+        if speech:
+            if start is None:
+                start = index
+            elif index - start >= max_frames:
+                segments.append((start, last_speech + 1))
+                start = index
+            last_speech = index
+        elif start is not None and index - last_speech >= split_frames:
+            segments.append((start, last_speech + 1))
+            start = None
+    if start is not None:
+        segments.append((start, last_speech + 1))
+
+    return [(max(0, (begin - padding_frames) * frame_length), min(len(audio), (end + padding_frames) * frame_length))
+            for begin, end in segments]
+
+
+def merge_segments(segments: List[Tuple[int, int]], max_samples: int) -> List[List[Tuple[int, int]]]:
+    # Whisper pads every call to 30 s, so one call per pause wastes most of its work.
+    # Adjacent segments are grouped while their total length stays within max_samples;
+    # only speech longer than that is transcribed in more than one call.
+    groups, current, current_length = [], [], 0
+    for start, end in segments:
+        if current and current_length + (end - start) > max_samples:
+            groups.append(current)
+            current, current_length = [], 0
+        current.append((start, end))
+        current_length += end - start
+    if current:
+        groups.append(current)
+    return groups
+
+
+def transcribe_audio_bytes(audio_bytes: bytes, model) -> str:
+    audio = decode_wav_bytes(audio_bytes)
+    segments = speech_segments(audio)
+    if not segments:
+        return ""
+    texts = []
+    for group in merge_segments(segments, MAX_SEGMENT_SECONDS * WHISPER_SAMPLE_RATE):
+        # Long pauses are cut out; the VAD padding around each segment keeps a short gap between words.
+        clip = np.concatenate([audio[start:end] for start, end in group])
+        # temperature=0 skips Whisper's temperature-fallback retries on short clips.
+        result = model.transcribe(clip, fp16=False, temperature=0.0, condition_on_previous_text=False)
+        texts.append(result["text"].strip())
+    return " ".join(text for text in texts if text)
@@ -0,0 +1,225 @@
+import hashlib
+import io
+import os
+import queue
+import re
+import subprocess
+import threading
+import time
+import wave
+from typing import List, Optional
+
+TTS_ENGINE = os.getenv('MEDIBOT_TTS_ENGINE', "gtts")
+TTS_ENGINES = ("gtts", "espeak", "silent")
+TTS_LANGUAGE = os.getenv('MEDIBOT_TTS_LANGUAGE', "en")
+TTS_CACHE_DIRECTORY = os.getenv('MEDIBOT_TTS_CACHE_DIR', '../.cache/tts')
+TTS_CACHE_ENABLED = os.getenv('MEDIBOT_TTS_CACHE', "1") == "1"
+MIN_SENTENCE_CHARS = 40
+SYNTHESIS_TIMEOUT_SECONDS = 60
+
+# A sentence ends at . ! or ? (optionally followed by closing quotes/brackets)
+# plus whitespace, or at a line break, which covers list-style SQL answers.
+SENTENCE_BOUNDARY = re.compile(r'[.!?]+["\')\]]*\s+|\n\s*')
+MARKDOWN_NOISE = re.compile(r'[*_#`|>]+')
+
+
+# Every engine turns one piece of text into one audio clip. `name` is part of
+# the cache key, so clips from different engines or voices never mix.
+class GTTSEngine:
+    format = "mp3"
+
+    def __init__(self, lang: str = TTS_LANGUAGE):
+        self.lang = lang
+        self.name = f"gtts-{lang}"
+
+    def synthesize(self, text: str) -> bytes:
+        from gtts import gTTS
+
+        audio_fp = io.BytesIO()
+        gTTS(text=text, lang=self.lang, slow=False).write_to_fp(audio_fp)
+        return audio_fp.getvalue()
+
+
+# Offline synthesizer through the espeak / espeak-ng command line tool.
+class EspeakEngine:
+    format = "wav"
+
+    def __init__(self, lang: str = TTS_LANGUAGE, executable: str = "espeak-ng"):
+        self.lang = lang
+        self.executable = executable
+        self.name = f"espeak-{lang}"
+
+    def synthesize(self, text: str) -> bytes:
+        result = subprocess.run([self.executable, "-v", self.lang, "--stdout", text],
+                                capture_output=True, check=True, timeout=SYNTHESIS_TIMEOUT_SECONDS)
+        return result.stdout
+
+
+# Writes silence proportional to the text length; used in tests and offline runs.
+class SilentEngine:
+    format = "wav"
+    name = "silent"
+
+    def __init__(self, sample_rate: int = 16000, seconds_per_char: float = 0.05):
+        self.sample_rate = sample_rate
+        self.seconds_per_char = seconds_per_char
+
+    def synthesize(self, text: str) -> bytes:
+        frame_count = int(len(text) * self.seconds_per_char * self.sample_rate)
+        audio_fp = io.BytesIO()
+        with wave.open(audio_fp, 'wb') as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(self.sample_rate)
+            wav_file.writeframes(b"\x00\x00" * frame_count)
+        return audio_fp.getvalue()
+
+
+def load_tts_engine(name: Optional[str] = None, lang: str = TTS_LANGUAGE):
+    name = name or TTS_ENGINE
+    if name == "gtts":
+        return GTTSEngine(lang)
+    if name == "espeak":
+        return EspeakEngine(lang)
+    if name == "silent":
+        return SilentEngine()
+    raise ValueError(f"Unknown TTS engine '{name}', expected one of {TTS_ENGINES}")
+
+
+# One file per clip, named by sha256(engine name + text). Repeated sentences
+# (disclaimers, cached answers) are read from disk instead of synthesized again.
+class TTSCache:
+    def __init__(self, directory: str = TTS_CACHE_DIRECTORY):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, engine, text: str) -> str:
+        digest = hashlib.sha256(f"{engine.name}\n{text}".encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, f"{digest}.{engine.format}")
+
+    def get(self, engine, text: str) -> Optional[bytes]:
+        path = self._path(engine, text)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def put(self, engine, text: str, audio: bytes):
+        path = self._path(engine, text)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(audio)
+        os.replace(temp_path, path)
+
+
+def clean_for_speech(text: str) -> str:
+    return " ".join(MARKDOWN_NOISE.sub(" ", text).split())
+
+
+# Incremental splitter for streamed tokens: feed() returns the sentences that are
+# complete so far. Fragments shorter than min_chars ("Dr.", "1.") are held back
+# and joined with the next sentence.
+class SentenceSplitter:
+    def __init__(self, min_chars: int = MIN_SENTENCE_CHARS):
+        self.min_chars = min_chars
+        self.buffer = ""
+
+    def feed(self, text: str) -> List[str]:
+        self.buffer += text
+        sentences = []
+        start = 0
+        for match in SENTENCE_BOUNDARY.finditer(self.buffer):
+            candidate = self.buffer[start:match.end()].strip()
+            if len(candidate) >= self.min_chars:
+                sentences.append(candidate)
+                start = match.end()
+        self.buffer = self.buffer[start:]
+        return sentences
+
+    def flush(self) -> List[str]:
+        remainder = self.buffer.strip()
+        self.buffer = ""
+        return [remainder] if remainder else []
+
+
+def join_audio(clips: List[bytes], audio_format: str) -> Optional[bytes]:
+    if not clips:
+        return None
+    if audio_format == "mp3":
+        # MP3 is a sequence of self-contained frames, so clips concatenate directly.
+        return b"".join(clips)
+    output = io.BytesIO()
+    with wave.open(output, 'wb') as out_file:
+        for index, clip in enumerate(clips):
+            with wave.open(io.BytesIO(clip), 'rb') as in_file:
+                if index == 0:
+                    out_file.setparams(in_file.getparams())
+                out_file.writeframes(in_file.readframes(in_file.getnframes()))
+    return output.getvalue()
+
+
+# Synthesizes an answer sentence by sentence on a background thread while the
+# LLM is still generating. feed() takes streamed tokens, finish() waits for the
+# remaining sentences and returns one audio clip for the whole answer.
+class SpeechPipeline:
+    def __init__(self, engine=None, cache: Optional[TTSCache] = None):
+        self.engine = engine or load_tts_engine()
+        self.cache = cache
+        self.splitter = SentenceSplitter()
+        self.clips = []
+        self.stats = {"sentences": 0, "cache_hits": 0, "errors": 0, "synthesis_seconds": 0.0}
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="medibot-tts", daemon=True)
+        self._worker.start()
+
+    def _synthesize(self, sentence: str) -> Optional[bytes]:
+        text = clean_for_speech(sentence)
+        if not any(c.isalnum() for c in text):
+            return None
+        if self.cache is not None:
+            audio = self.cache.get(self.engine, text)
+            if audio is not None:
+                self.stats["cache_hits"] += 1
+                return audio
+        start_time = time.perf_counter()
+        audio = self.engine.synthesize(text)
+        self.stats["synthesis_seconds"] += time.perf_counter() - start_time
+        if self.cache is not None and audio:
+            self.cache.put(self.engine, text, audio)
+        return audio
+
+    def _run(self):
+        while True:
+            sentence = self._queue.get()
+            if sentence is None:
+                return
+            try:
+                audio = self._synthesize(sentence)
+                if audio:
+                    self.clips.append(audio)
+                    self.stats["sentences"] += 1
+            except Exception as e:
+                # A failed sentence is skipped; the rest of the answer is still spoken.
+                self.stats["errors"] += 1
+                print(f"TTS error ({self.engine.name}): {e}")
+
+    def feed(self, text: str):
+        for sentence in self.splitter.feed(text):
+            self._queue.put(sentence)
+
+    def finish(self, timeout: Optional[float] = SYNTHESIS_TIMEOUT_SECONDS) -> Optional[bytes]:
+        for sentence in self.splitter.flush():
+            self._queue.put(sentence)
+        self._queue.put(None)
+        self._worker.join(timeout)
+        if self._worker.is_alive():
+            print(f"TTS did not finish within {timeout}s; returning the sentences synthesized so far.")
+        print(f"TTS: {self.stats['sentences']} sentences, {self.stats['cache_hits']} cached, "
+              f"{self.stats['errors']} errors, {self.stats['synthesis_seconds']:.2f}s synthesis")
+        return join_audio(list(self.clips), self.engine.format)
+
+    def cancel(self):
+        # Drops pending sentences and lets the worker exit.
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        self._queue.put(None)
@@ -0,0 +1,11 @@
+-- Data-version stamp read by the app's SQL cache (app/sql_cache.py). insert_data.py
+-- and every migration run this file after loading data, which bumps the version
+-- and makes running apps drop their cached SQL and query results.
+CREATE TABLE IF NOT EXISTS medibot_data_version (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version BIGINT NOT NULL,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO medibot_data_version (id, version) VALUES (1, 1)
+ON CONFLICT (id) DO UPDATE SET version = medibot_data_version.version + 1, updated_at = CURRENT_TIMESTAMP;
@@ -1,39 +1,349 @@
+import argparse
+import itertools
+import random
+import re
+import time
+
 import psycopg2
-from psycopg2 import sql
 
 db_config = {
-                            "host": "localhost",     
-                            "port": 5432,             
-                            "database": "mydb", 
-                            "user": "nevenar",         
-                            "password": "nevena123"
+    "host": "localhost",
+    "port": 5432,
+    "database": "mydb",
+    "user": "nevenar",
+    "password": "nevena123"
 }
-conn = psycopg2.connect(**db_config)
+SEED_SQL_PATH = 'mydb.sql'
+DATA_VERSION_SQL_PATH = 'data_version.sql'
+DEFAULT_BATCH_SIZE = 50000
+# Institutions first: doctors.institution_id references them once migrations have run.
+TABLES = ("institutions", "doctors")
 
-try:
-    conn = psycopg2.connect(**db_config)
-    print("Connected to the database!")
+INSERT_PATTERN = re.compile(r"^INSERT\s+INTO\s+(\w+)\s*\(([^)]*)\)\s*VALUES\s*(.*)$", re.IGNORECASE | re.DOTALL)
+CREATE_TABLE_PATTERN = re.compile(r"^CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)", re.IGNORECASE)
+
+FIRST_NAMES = [
+    "Emily", "James", "Sophia", "Michael", "Olivia", "William", "Emma", "Daniel", "Ava", "David", "Mia", "Joseph",
+    "Isabella", "Thomas", "Charlotte", "Henry", "Amelia", "Samuel", "Grace", "Lucas", "Nora", "Benjamin", "Chloe",
+    "Elijah", "Hannah", "Ethan", "Zoe", "Alexander", "Layla", "Jacob", "Aisha", "Mateo", "Priya", "Wei", "Fatima",
+    "Hiroshi", "Elena", "Omar", "Ingrid", "Rafael", "Sarah", "John", "Robert", "Jennifer", "Linda", "Maria",
+]
+LAST_NAMES = [
+    "Williams", "Smith", "Johnson", "Brown", "Jones", "Miller", "Davis", "Garcia", "Martinez", "Wilson", "Anderson",
+    "Taylor", "Thomas", "Moore", "Jackson", "Martin", "Lee", "Thompson", "White", "Harris", "Clark", "Lewis",
+    "Walker", "Hall", "Young", "King", "Wright", "Lopez", "Hill", "Scott", "Nguyen", "Patel", "Kim", "Chen",
+    "O'Brien", "Novak", "Rossi", "Schmidt", "Kowalski", "Haddad", "Tanaka", "Okafor", "Silva", "Jovanovic",
+]
+# Specialization -> fields of interest a specialist in it plausibly lists.
+SPECIALIZATION_INTERESTS = {
+    "Cardiology": ["Hypertension", "Heart Failure", "Arrhythmia", "Coronary Artery Disease"],
+    "Dermatology": ["Acne", "Psoriasis", "Eczema", "Skin Cancer"],
+    "Gynecology": ["Pregnancy", "Endometriosis", "Menopause", "Infertility"],
+    "Internal Medicine": ["Diabetes", "Hypertension", "Obesity", "Anemia"],
+    "Neurology": ["Stroke", "Epilepsy", "Migraine", "Multiple Sclerosis"],
+    "Ophthalmology": ["Cataracts", "Glaucoma", "Macular Degeneration", "Diabetic Retinopathy"],
+    "Orthopedics": ["Bone Fractures", "Arthritis", "Sports Injuries", "Scoliosis"],
+    "Pediatrics": ["Childhood Asthma", "Childhood Obesity", "Allergies", "Vaccination"],
+    "Psychiatry": ["Depression", "Anxiety Disorders", "Bipolar Disorder", "Insomnia"],
+    "Surgery": ["Appendicitis", "Hernia Repair", "Gallbladder Disease", "Trauma Surgery"],
+}
+# Larger systems employ more doctors; weights skew doctors toward the big names.
+INSTITUTION_SUFFIXES = [("Hospital", 5), ("Medical Center", 4), ("Clinic", 3), ("Health Care", 1)]
+CITIES = [
+    ("Boston", "MA"), ("Chicago", "IL"), ("Houston", "TX"), ("Phoenix", "AZ"), ("Seattle", "WA"),
+    ("Denver", "CO"), ("Atlanta", "GA"), ("Miami", "FL"), ("Portland", "OR"), ("Nashville", "TN"),
+    ("Detroit", "MI"), ("Baltimore", "MD"), ("Cleveland", "OH"), ("San Diego", "CA"), ("Minneapolis", "MN"),
+]
+STREETS = ["Main St", "Oak Ave", "Maple Dr", "Park Blvd", "Lake Rd", "Hill St", "Elm St", "Washington Ave"]
+INSTITUTION_PREFIXES = ["St. Mary's", "Riverside", "Mercy", "Providence", "University", "Memorial", "Sacred Heart",
+                        "Good Samaritan", "Children's", "Baptist", "Kaiser", "Northside", "Lakeview", "Summit"]
+
+
+# SQL script handling
+
+def split_sql(script):
+    # Splits on semicolons outside string literals, quoted identifiers, dollar-quoted
+    # bodies and comments. Comments are dropped; everything else is kept verbatim.
+    statements, current, i, length = [], [], 0, len(script)
+    while i < length:
+        char = script[i]
+        if char in ("'", '"'):
+            end = i + 1
+            while end < length:
+                if script[end] == char:
+                    if end + 1 < length and script[end + 1] == char:
+                        end += 2
+                        continue
+                    break
+                end += 1
+            current.append(script[i:end + 1])
+            i = end + 1
+        elif script.startswith("--", i):
+            end = script.find("\n", i)
+            i = length if end == -1 else end
+        elif script.startswith("/*", i):
+            end = script.find("*/", i + 2)
+            i = length if end == -1 else end + 2
+        elif char == "$" and re.match(r"\$(\w*)\$", script[i:]):
+            tag = re.match(r"\$(\w*)\$", script[i:]).group(0)
+            end = script.find(tag, i + len(tag))
+            end = length if end == -1 else end + len(tag)
+            current.append(script[i:end])
+            i = end
+        elif char == ";":
+            statements.append("".join(current).strip())
+            current, i = [], i + 1
+        else:
+            current.append(char)
+            i += 1
+    statements.append("".join(current).strip())
+    return [statement for statement in statements if statement]
+
+
+def parse_value(token):
+    token = token.strip()
+    if token.upper() == "NULL":
+        return None
+    if token.startswith("'") and token.endswith("'"):
+        return token[1:-1].replace("''", "'")
+    return token
+
+
+def parse_values(values_sql):
+    # "(1, 'O''Brien', NULL), (2, ...)" -> [["1", "O'Brien", None], ["2", ...]]
+    rows, row, token, depth, in_string, i = [], [], [], 0, False, 0
+    while i < len(values_sql):
+        char = values_sql[i]
+        if in_string:
+            token.append(char)
+            if char == "'":
+                if i + 1 < len(values_sql) and values_sql[i + 1] == "'":
+                    token.append("'")
+                    i += 1
+                else:
+                    in_string = False
+        elif char == "'":
+            in_string = True
+            token.append(char)
+        elif char == "(":
+            depth += 1
+            if depth > 1:
+                token.append(char)
+        elif char == ")":
+            depth -= 1
+            if depth == 0:
+                row.append(parse_value("".join(token)))
+                rows.append(row)
+                row, token = [], []
+            else:
+                token.append(char)
+        elif char == "," and depth == 1:
+            row.append(parse_value("".join(token)))
+            token = []
+        elif depth > 0:
+            token.append(char)
+        i += 1
+    return rows
+
+
+def read_seed(path):
+    # CREATE TABLE statements by table, and the INSERTed rows as {table: (columns, rows)}.
+    with open(path, 'r', encoding='utf-8') as f:
+        statements = split_sql(f.read())
+    create_statements, seed_rows = {}, {}
+    for statement in statements:
+        create_match = CREATE_TABLE_PATTERN.match(statement)
+        insert_match = INSERT_PATTERN.match(statement)
+        if create_match:
+            create_statements[create_match.group(1).lower()] = statement
+        elif insert_match:
+            table = insert_match.group(1).lower()
+            columns = [column.strip() for column in insert_match.group(2).split(",")]
+            known_columns, rows = seed_rows.setdefault(table, (columns, []))
+            if known_columns != columns:
+                raise ValueError(f"INSERTs into {table} use different column lists.")
+            rows.extend(parse_values(insert_match.group(3)))
+        else:
+            print(f"Skipping unsupported statement: {statement[:60]}...")
+    return create_statements, seed_rows
+
+
+# Synthetic data
+
+def generate_institutions(rng, count, start_id):
+    used_names = set()
+    for institution_id in range(start_id, start_id + count):
+        city, state = rng.choice(CITIES)
+        suffix = rng.choices([s for s, _ in INSTITUTION_SUFFIXES], weights=[w for _, w in INSTITUTION_SUFFIXES])[0]
+        name = f"{rng.choice(INSTITUTION_PREFIXES)} {city} {suffix}"
+        if name in used_names:
+            # Institution names stay unique, like real ones; the template matcher relies on it.
+            name = f"{name} {institution_id}"
+        used_names.add(name)
+        yield [institution_id, name, rng.choice(["Private", "Public"]),
+               f"{rng.randint(1, 9999)} {rng.choice(STREETS)}, {city}, {state}"]
+
+
+def generate_doctors(rng, count, start_id, institution_ids):
+    specializations = list(SPECIALIZATION_INTERESTS)
+    # A few institutions employ many doctors, most employ a handful.
+    # Cumulative weights are computed once; choices() then bisects instead of summing per row.
+    cum_weights = list(itertools.accumulate(1.0 / (rank + 1) ** 0.8 for rank in range(len(institution_ids))))
+    for doctor_id in range(start_id, start_id + count):
+        specialization = rng.choice(specializations)
+        yield [doctor_id, f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", specialization,
+               rng.choice(SPECIALIZATION_INTERESTS[specialization]),
+               rng.choices(institution_ids, cum_weights=cum_weights)[0]]
+
+
+# COPY loading
 
+def copy_field(value):
+    if value is None:
+        return "\\N"
+    return (str(value).replace("\\", "\\\\").replace("\t", "\\t")
+            .replace("\n", "\\n").replace("\r", "\\r"))
+
+
+class RowStream:
+    # File-like view over an iterator of rows in COPY text format, so copy_expert
+    # streams them without building the whole load in memory.
+    def __init__(self, rows, limit):
+        self._rows = rows
+        self._limit = limit
+        self._buffer = ""
+        self.count = 0
+
+    def read(self, size=-1):
+        while (size < 0 or len(self._buffer) < size) and self.count < self._limit:
+            row = next(self._rows, None)
+            if row is None:
+                self._limit = self.count
+                break
+            self._buffer += "\t".join(copy_field(value) for value in row) + "\n"
+            self.count += 1
+        if size < 0:
+            size = len(self._buffer)
+        chunk, self._buffer = self._buffer[:size], self._buffer[size:]
+        return chunk
+
+    readline = read
+
+
+def copy_rows(cursor, table, columns, rows, batch_size, mode):
+    # Streams rows into a temporary staging_<table> in COPY batches. In "upsert" mode
+    # each batch is merged with INSERT ... ON CONFLICT (id), so re-runs update rows in
+    # place instead of failing on duplicate keys. In "replace" mode the rows stay in
+    # staging until replace_tables() swaps them in.
+    rows, total, column_list = iter(rows), 0, ", ".join(columns)
+    cursor.execute(f"CREATE TEMP TABLE IF NOT EXISTS staging_{table} (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP")
+    updates = ", ".join(f"{column} = EXCLUDED.{column}" for column in columns if column != "id")
+    while True:
+        stream = RowStream(rows, batch_size)
+        cursor.copy_expert(f"COPY staging_{table} ({column_list}) FROM STDIN", stream)
+        if mode == "upsert" and stream.count:
+            cursor.execute(f"INSERT INTO {table} ({column_list}) SELECT {column_list} FROM staging_{table} "
+                           f"ON CONFLICT (id) DO UPDATE SET {updates}")
+            cursor.execute(f"TRUNCATE staging_{table}")
+        total += stream.count
+        if stream.count < batch_size:
+            return total
+        print(f"  {table}: {total} rows")
+
+
+def replace_tables(cursor, columns_by_table):
+    # The live tables are only touched once every row is staged. DELETE and
+    # INSERT ... SELECT take row locks, not the ACCESS EXCLUSIVE lock TRUNCATE
+    # needs, so queries keep reading the old rows until the commit instead of
+    # waiting for the load.
+    for table in reversed(TABLES):
+        cursor.execute(f"DELETE FROM {table}")
+    for table in TABLES:
+        column_list = ", ".join(columns_by_table[table])
+        cursor.execute(f"INSERT INTO {table} ({column_list}) SELECT {column_list} FROM staging_{table}")
+
+
+def ensure_tables(cursor, create_statements):
+    for table in TABLES:
+        cursor.execute("SELECT to_regclass(%s)", (table,))
+        if cursor.fetchone()[0] is None:
+            print(f"Creating table {table}")
+            cursor.execute(create_statements[table])
+
+
+def load(conn, mode, batch_size, synthetic_institutions, synthetic_doctors, seed):
+    create_statements, seed_rows = read_seed(SEED_SQL_PATH)
+    rng = random.Random(seed)
     cursor = conn.cursor()
-    with open('mydb.sql', 'r', encoding='utf-8') as f:
-        sql_script = f.read()
-        queries = sql_script.split(';')
-        for query in queries:
-            query = query.strip()
-            if query:  
-                try:
-                    cursor.execute(query)
-                except psycopg2.Error as e:
-                    print(f"Error while executing query: {query}\nError: {e}")
-                    conn.rollback() 
-        conn.commit()
+    try:
+        ensure_tables(cursor, create_statements)
+
+        institution_columns, institution_rows = seed_rows["institutions"]
+        doctor_columns, doctor_rows = seed_rows["doctors"]
+        # Synthetic ids continue after the seed ids, so the seed data stays as it is.
+        next_institution_id = max(int(row[0]) for row in institution_rows) + 1
+        next_doctor_id = max(int(row[0]) for row in doctor_rows) + 1
+        institution_ids = [int(row[0]) for row in institution_rows]
+        institution_ids += range(next_institution_id, next_institution_id + synthetic_institutions)
 
+        start_time = time.perf_counter()
+        loaded = {}
+        loaded["institutions"] = copy_rows(cursor, "institutions", institution_columns, (
+            row for rows in (institution_rows, generate_institutions(rng, synthetic_institutions, next_institution_id))
+            for row in rows), batch_size, mode)
+        loaded["doctors"] = copy_rows(cursor, "doctors", doctor_columns, (
+            row for rows in (doctor_rows, generate_doctors(rng, synthetic_doctors, next_doctor_id, institution_ids))
+            for row in rows), batch_size, mode)
+        if mode == "replace":
+            replace_tables(cursor, {"institutions": institution_columns, "doctors": doctor_columns})
+        load_seconds = time.perf_counter() - start_time
+
+        # Bump the data-version stamp so cached SQL and results in running apps are dropped.
+        with open(DATA_VERSION_SQL_PATH, 'r', encoding='utf-8') as f:
+            for query in split_sql(f.read()):
+                cursor.execute(query)
+        conn.commit()
+        # Replacing (or upserting) every row leaves the old versions as dead tuples;
+        # VACUUM reclaims them and ANALYZE gives the planner the new table sizes.
+        # VACUUM cannot run inside a transaction block, hence autocommit.
+        conn.autocommit = True
+        try:
+            for table in TABLES:
+                cursor.execute(f"VACUUM (ANALYZE) {table}")
+        finally:
+            conn.autocommit = False
 
-except psycopg2.Error as e:
-    print(f"Error while executing SQL file: {e}")
-    if conn:
+        total_rows = sum(loaded.values())
+        print(f"Loaded {loaded['institutions']} institutions and {loaded['doctors']} doctors ({mode}) in "
+              f"{load_seconds:.1f}s, {total_rows / max(load_seconds, 1e-9):,.0f} rows/s")
+        cursor.execute("SELECT version FROM medibot_data_version")
+        print(f"Data version is now {cursor.fetchone()[0]}")
+    except Exception:
         conn.rollback()
-finally:
-    if conn:
+        raise
+    finally:
         cursor.close()
-        conn.close()
\ No newline at end of file
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load the seed data from mydb.sql, plus optional synthetic rows, with COPY.")
+    parser.add_argument('--mode', choices=["replace", "upsert"], default="replace",
+                        help="replace: swap in the new rows in one transaction, readers keep the old rows until "
+                             "it commits; upsert: insert or update by id.")
+    parser.add_argument('--doctors', type=int, default=0, help="Synthetic doctors to add to the seed data.")
+    parser.add_argument('--institutions', type=int, default=None,
+                        help="Synthetic institutions (default: one per 200 synthetic doctors).")
+    parser.add_argument('--seed', type=int, default=42, help="Random seed; the same seed gives the same rows.")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+    synthetic_institution_count = args.institutions if args.institutions is not None else args.doctors // 200
+
+    conn = psycopg2.connect(**db_config)
+    print("Connected to the database!")
+    try:
+        load(conn, args.mode, args.batch_size, synthetic_institution_count, args.doctors, args.seed)
+    except (psycopg2.Error, ValueError) as e:
+        print(f"Error while loading data: {e}")
+        raise SystemExit(1)
+    finally:
+        conn.close()
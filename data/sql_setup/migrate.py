@@ -0,0 +1,109 @@
+import argparse
+import glob
+import os
+
+import psycopg2
+
+from insert_data import split_sql
+
+db_config = {
+    "host": "localhost",
+    "port": 5432,
+    "database": "mydb",
+    "user": "nevenar",
+    "password": "nevena123"
+}
+MIGRATIONS_DIRECTORY = 'migrations'
+DATA_VERSION_SQL_PATH = 'data_version.sql'
+# First line of a migration whose statements cannot run in a transaction (CREATE INDEX CONCURRENTLY).
+NO_TRANSACTION_MARKER = '-- migrate: no-transaction'
+
+# Applied migrations are recorded by file name, so each one runs once per database.
+CREATE_MIGRATIONS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS medibot_schema_migrations (
+    name VARCHAR(255) PRIMARY KEY,
+    applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+)"""
+
+
+def migration_files(directory=MIGRATIONS_DIRECTORY):
+    # NNN_description.sql, applied in file-name order.
+    return sorted(glob.glob(os.path.join(directory, '[0-9][0-9][0-9]_*.sql')))
+
+
+def read_sql(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def is_transactional(sql):
+    return not sql.lstrip().startswith(NO_TRANSACTION_MARKER)
+
+
+def applied_migrations(cursor):
+    cursor.execute(CREATE_MIGRATIONS_TABLE_SQL)
+    cursor.execute("SELECT name FROM medibot_schema_migrations")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def migrate(conn, directory=MIGRATIONS_DIRECTORY, dry_run=False):
+    cursor = conn.cursor()
+    try:
+        done = applied_migrations(cursor)
+        conn.commit()
+        pending = [path for path in migration_files(directory) if os.path.basename(path) not in done]
+        if not pending:
+            print("No pending migrations.")
+            return []
+        for path in pending:
+            name = os.path.basename(path)
+            if dry_run:
+                print(f"Would apply {name}")
+                continue
+            print(f"Applying {name} ...")
+            sql = read_sql(path)
+            if is_transactional(sql):
+                # One transaction per file: the whole file is sent at once, so DO $$ ... $$
+                # blocks are never split, and a failure leaves nothing half-applied.
+                try:
+                    cursor.execute(sql)
+                    cursor.execute("INSERT INTO medibot_schema_migrations (name) VALUES (%s)", (name,))
+                    conn.commit()
+                except psycopg2.Error:
+                    conn.rollback()
+                    raise
+            else:
+                # Each statement commits on its own; the file is recorded only once all of
+                # them succeeded, so after a failure it runs again (its statements must be idempotent).
+                conn.autocommit = True
+                try:
+                    for statement in split_sql(sql):
+                        cursor.execute(statement)
+                finally:
+                    conn.autocommit = False
+                cursor.execute("INSERT INTO medibot_schema_migrations (name) VALUES (%s)", (name,))
+                conn.commit()
+        if not dry_run:
+            # Schema changes can change query results and plans; running apps drop their SQL caches.
+            cursor.execute(read_sql(DATA_VERSION_SQL_PATH))
+            conn.commit()
+            cursor.execute("SELECT version FROM medibot_data_version")
+            print(f"Data version is now {cursor.fetchone()[0]}")
+        return pending
+    finally:
+        cursor.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply the SQL migrations in data/sql_setup/migrations.")
+    parser.add_argument('--dry-run', action='store_true', help="Only list the migrations that would be applied.")
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(**db_config)
+    try:
+        migrate(conn, dry_run=args.dry_run)
+    except psycopg2.Error as e:
+        print(f"Migration failed: {e}")
+        raise SystemExit(1)
+    finally:
+        conn.close()
@@ -0,0 +1,18 @@
+-- doctors.institution_id joins to institutions.id. NOT VALID adds the foreign key
+-- without scanning doctors, so the ALTER TABLE lock is held only briefly; existing
+-- rows are checked by 002, in its own transaction.
+-- Every statement is idempotent, so a partly applied migration can be re-run.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint
+        WHERE conname = 'doctors_institution_id_fkey' AND conrelid = 'doctors'::regclass
+    ) THEN
+        ALTER TABLE doctors
+            ADD CONSTRAINT doctors_institution_id_fkey
+            FOREIGN KEY (institution_id) REFERENCES institutions (id) NOT VALID;
+    END IF;
+END
+$$;
@@ -0,0 +1,4 @@
+-- Checks the existing rows against the foreign key added by 001. VALIDATE takes a
+-- SHARE UPDATE EXCLUSIVE lock, so reads and writes on doctors continue while it scans.
+-- A no-op once the constraint is valid.
+ALTER TABLE doctors VALIDATE CONSTRAINT doctors_institution_id_fkey;
@@ -0,0 +1,22 @@
+-- migrate: no-transaction
+-- Indexes for the query shapes the SQL prompt and templates produce:
+--   * doctors.institution_id, the join key to institutions.id,
+--   * ILIKE '%...%' on names, specializations and fields of interest (pg_trgm GIN),
+--   * exact, case-insensitive lookups by specialization / field of interest
+--     (lower() expression indexes, used by app/sql_templates.py).
+-- CONCURRENTLY builds each index without blocking writes, but cannot run inside a
+-- transaction, hence the marker above: migrate.py runs the statements one by one.
+-- A build that fails leaves an INVALID index behind, which IF NOT EXISTS would then
+-- skip; drop it with DROP INDEX CONCURRENTLY before re-running.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS doctors_institution_id_idx ON doctors (institution_id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS doctors_doctor_name_trgm_idx ON doctors USING gin (doctor_name gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS doctors_specialization_trgm_idx ON doctors USING gin (specialization gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS doctors_field_of_interest_trgm_idx ON doctors USING gin (field_of_interest gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS institutions_institution_name_trgm_idx ON institutions USING gin (institution_name gin_trgm_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS doctors_specialization_lower_idx ON doctors (lower(specialization));
+CREATE INDEX CONCURRENTLY IF NOT EXISTS doctors_field_of_interest_lower_idx ON doctors (lower(field_of_interest));
+
+ANALYZE doctors;
+ANALYZE institutions;
@@ -0,0 +1,9 @@
+-- migrate: no-transaction
+-- Exact, case-insensitive name lookups: app/sql_templates.py checks the phrases of
+-- each question against lower(doctor_name) and lower(institution_name) instead of
+-- keeping every name in memory. Built CONCURRENTLY, like 003.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS doctors_doctor_name_lower_idx ON doctors (lower(doctor_name));
+CREATE INDEX CONCURRENTLY IF NOT EXISTS institutions_institution_name_lower_idx ON institutions (lower(institution_name));
+
+ANALYZE doctors;
+ANALYZE institutions;
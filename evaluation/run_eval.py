@@ -0,0 +1,297 @@
+import os
+import sys
+sys.path.append("../app/")
+
+import argparse
+import json
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+from agent_setup import RAG_MODE, get_compiled_graph_app
+from memory import ConversationMemory
+from instrumentation import trace_request
+
+DATASET_CSV_PATH = "evaluation_dataset.csv"
+CHECKPOINT_PATH = "evaluation_checkpoint.jsonl"
+# evaluation_results.csv is the committed baseline written by evaluate.py; runs here do not overwrite it.
+RESULTS_CSV_PATH = "run_eval_results.csv"
+SUMMARY_JSON_PATH = "evaluation_summary.json"
+PERCENTILES = (50, 95, 99)
+
+
+def load_conversations(df_dataset: pd.DataFrame):
+    # Rows whose notes say they test context are follow-ups of the row before them,
+    # so they run in the same conversation; every other row starts a new one.
+    conversations = []
+    for index, test_case in df_dataset.iterrows():
+        item = {
+            "id": str(test_case.get("id", f"Row_{index}")),
+            "question": test_case.get("Input Question", ""),
+            "expected_classification": test_case.get("Expected Classification", ""),
+            "ideal_answer_info": test_case.get("Ideal Answer / Key Info", ""),
+            "notes": test_case.get("Notes", ""),
+        }
+        if conversations and "tests context" in str(item["notes"]).lower():
+            conversations[-1].append(item)
+        else:
+            conversations.append([item])
+    return conversations
+
+
+def load_checkpoint(path):
+    completed = {}
+    if not os.path.exists(path):
+        return completed
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A crash mid-write leaves at most one partial trailing line.
+                continue
+            completed[(record["id"], record["repeat"])] = record
+    return completed
+
+
+class CheckpointWriter:
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def write(self, record):
+        with self._lock:
+            self._file.write(json.dumps(record) + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+def invoke_with_node_timings(agent_app, inputs):
+    # The graph runs one node at a time, so the gap between two "updates" events is
+    # the duration of the node that produced the second one.
+    state = dict(inputs)
+    node_seconds = {}
+    last_time = time.perf_counter()
+    for update in agent_app.stream(inputs, stream_mode="updates"):
+        now = time.perf_counter()
+        for node_name, node_update in update.items():
+            node_seconds[node_name] = node_seconds.get(node_name, 0.0) + (now - last_time)
+            if node_update:
+                state.update(node_update)
+        last_time = now
+    return state, node_seconds
+
+
+def run_conversation(agent_app, conversation, repeat, completed, checkpoint):
+    memory = ConversationMemory()
+    records = []
+    rerun = False
+    for item in conversation:
+        done = completed.get((item["id"], repeat))
+        # Items whose invocation raised are run again; so is the rest of their
+        # conversation, since its history changes with the new answer.
+        if done and not done.get("failed") and not rerun:
+            memory.add_turn(item["question"], done["actual_answer"])
+            continue
+        rerun = True
+
+        inputs = {"question": item["question"], "chat_history": memory.as_messages()}
+        start_time = time.perf_counter()
+        response_state, node_seconds, error = {}, {}, None
+        try:
+            with trace_request(item["question"], session_id=f"eval-{repeat}") as trace:
+                response_state, node_seconds = invoke_with_node_timings(agent_app, inputs)
+                if trace is not None:
+                    trace["route"] = response_state.get("question_type")
+            final_answer = response_state.get('final_answer', 'Agent did not return a final_answer.')
+        except Exception as e:
+            print(f"ERROR invoking agent for question ID {item['id']}: {e}")
+            traceback.print_exc()
+            final_answer = f"ERROR: {e}"
+            error = str(e)
+        latency = time.perf_counter() - start_time
+
+        record = dict(item)
+        record.update({
+            "repeat": repeat,
+            "actual_classification": response_state.get("question_type"),
+            "actual_answer": final_answer,
+            "latency_seconds": latency,
+            "node_seconds": node_seconds,
+            "speculation": response_state.get("speculation"),
+            "error": error or response_state.get("error"),
+            "failed": error is not None,
+        })
+        checkpoint.write(record)
+        records.append(record)
+        memory.add_turn(item["question"], final_answer)
+        print(f"[repeat {repeat}] {item['id']}: {record['actual_classification']} in {latency:.2f}s")
+    return records
+
+
+def percentiles(values):
+    if not values:
+        return {}
+    summary = {f"p{p}": float(np.percentile(values, p)) for p in PERCENTILES}
+    summary["mean"] = float(np.mean(values))
+    summary["count"] = len(values)
+    return summary
+
+
+def summarize(records):
+    summary = {"rag_mode": RAG_MODE, "router_in_sample": os.getenv('MEDIBOT_ROUTER_EVAL_EXAMPLES', '1') == '1',
+               "items": len(records), "latency": {}, "latency_by_route": {}, "latency_by_node": {}}
+    summary["latency"]["all"] = percentiles([r["latency_seconds"] for r in records])
+    summary["latency"]["cold"] = percentiles([r["latency_seconds"] for r in records if r["repeat"] == 0])
+    summary["latency"]["warm"] = percentiles([r["latency_seconds"] for r in records if r["repeat"] > 0])
+
+    for route in ("sql", "rag", "general"):
+        summary["latency_by_route"][route] = percentiles(
+            [r["latency_seconds"] for r in records if r.get("actual_classification") == route])
+
+    node_values = {}
+    for record in records:
+        for node_name, seconds in (record.get("node_seconds") or {}).items():
+            node_values.setdefault(node_name, []).append(seconds)
+    summary["latency_by_node"] = {node_name: percentiles(values) for node_name, values in sorted(node_values.items())}
+
+    speculations = [r["speculation"] for r in records if r.get("speculation")]
+    summary["speculation"] = {
+        "outcomes": {outcome: sum(1 for s in speculations if s["outcome"] == outcome)
+                     for outcome in sorted({s["outcome"] for s in speculations})},
+        "saved_seconds": percentiles([s["saved_seconds"] for s in speculations if s.get("saved_seconds") is not None]),
+    }
+
+    routed = [r for r in records if r.get("expected_classification")]
+    correct = sum(1 for r in routed if str(r.get("actual_classification")).lower() == str(r["expected_classification"]).lower())
+    summary["routing_accuracy"] = correct / len(routed) if routed else None
+    summary["errors"] = sum(1 for r in records if r.get("error"))
+    return summary
+
+
+def compare_with_baseline(summary, baseline_path):
+    # Before/after p50 and p95 per route, e.g. a MEDIBOT_RAG_MODE=two_pass run against a single one.
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    comparison = {"baseline_path": baseline_path, "baseline_rag_mode": baseline.get("rag_mode"), "routes": {}}
+    for route, stats in summary["latency_by_route"].items():
+        before = baseline.get("latency_by_route", {}).get(route) or {}
+        if not stats or not before:
+            continue
+        comparison["routes"][route] = {
+            f"{p}_{when}": value for p in ("p50", "p95")
+            for when, value in (("before", before[p]), ("after", stats[p]))
+        }
+        comparison["routes"][route]["p50_speedup"] = before["p50"] / stats["p50"] if stats["p50"] else None
+    return comparison
+
+
+def print_summary(summary):
+    def line(name, stats):
+        if not stats:
+            return f"  {name:<26} (no samples)"
+        return (f"  {name:<26} n={stats['count']:<4} p50={stats['p50']:7.2f}s "
+                f"p95={stats['p95']:7.2f}s p99={stats['p99']:7.2f}s")
+
+    print(f"\n--- Evaluation summary (rag mode: {summary['rag_mode']}) ---")
+    for name, stats in summary["latency"].items():
+        print(line(name, stats))
+    print("By route:")
+    for name, stats in summary["latency_by_route"].items():
+        print(line(name, stats))
+    print("By node:")
+    for name, stats in summary["latency_by_node"].items():
+        print(line(name, stats))
+    speculation = summary.get("speculation") or {}
+    if speculation.get("outcomes"):
+        print(f"Speculative retrieval: {speculation['outcomes']}")
+        print(line("saved on the rag path", speculation["saved_seconds"]))
+    if summary["routing_accuracy"] is not None:
+        sample = "in-sample: the router was trained on these rows" if summary["router_in_sample"] else "held out"
+        print(f"Routing accuracy: {summary['routing_accuracy']:.1%} ({sample})")
+    print(f"Errors: {summary['errors']}")
+    comparison = summary.get("baseline")
+    if comparison:
+        print(f"Against {comparison['baseline_path']} (rag mode: {comparison['baseline_rag_mode']}):")
+        for route, values in comparison["routes"].items():
+            speedup = f"{values['p50_speedup']:.2f}x" if values["p50_speedup"] else "n/a"
+            print(f"  {route:<26} p50 {values['p50_before']:7.2f}s -> {values['p50_after']:7.2f}s ({speedup}), "
+                  f"p95 {values['p95_before']:7.2f}s -> {values['p95_after']:7.2f}s")
+
+
+def save_results(records, filepath):
+    column_order = [
+        "id", "repeat", "question", "expected_classification", "actual_classification",
+        "ideal_answer_info", "actual_answer", "latency_seconds", "notes", "error"
+    ]
+    df_results = pd.DataFrame(records)
+    node_columns = pd.json_normalize(df_results.pop("node_seconds").tolist()).add_prefix("node_seconds.")
+    df_results = pd.concat([df_results[[c for c in column_order if c in df_results.columns]], node_columns], axis=1)
+    df_results.to_csv(filepath, index=False, encoding='utf-8')
+    print(f"Results saved successfully to {filepath}")
+
+
+def run_evaluation(df_dataset, concurrency, repeats, checkpoint_path, resume):
+    if not resume and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    completed = load_checkpoint(checkpoint_path)
+    if completed:
+        failed = sum(1 for record in completed.values() if record.get("failed"))
+        print(f"Resuming: {len(completed) - failed} items already in {checkpoint_path}, {failed} failed ones to retry")
+
+    agent_app = get_compiled_graph_app()
+    conversations = load_conversations(df_dataset)
+    checkpoint = CheckpointWriter(checkpoint_path)
+    try:
+        # Repeats run one after another so repeat 0 measures cold and later repeats warm caches.
+        for repeat in range(repeats):
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                futures = [pool.submit(run_conversation, agent_app, conversation, repeat, completed, checkpoint)
+                           for conversation in conversations]
+                for future in as_completed(futures):
+                    future.result()
+    finally:
+        checkpoint.close()
+
+    records = list(load_checkpoint(checkpoint_path).values())
+    records.sort(key=lambda r: (r["repeat"], int(r["id"]) if str(r["id"]).isdigit() else 0, str(r["id"])))
+    return records
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the evaluation dataset through the agent in parallel.")
+    parser.add_argument('--dataset', default=DATASET_CSV_PATH)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--repeats', type=int, default=1)
+    parser.add_argument('--checkpoint', default=CHECKPOINT_PATH)
+    parser.add_argument('--resume', action='store_true',
+                        help="Skip items already recorded in the checkpoint; items that raised are retried.")
+    parser.add_argument('--results', default=RESULTS_CSV_PATH)
+    parser.add_argument('--summary', default=SUMMARY_JSON_PATH)
+    parser.add_argument('--baseline', help="Summary JSON of an earlier run to record before/after latencies against.")
+    parser.add_argument('--router-in-sample', action='store_true',
+                        help="Let the local router use the evaluation rows as examples (as the app does).")
+    args = parser.parse_args()
+
+    # By default the router sees only its seed examples, so routing accuracy is not measured on its own training data.
+    os.environ['MEDIBOT_ROUTER_EVAL_EXAMPLES'] = '1' if args.router_in_sample else '0'
+
+    df_eval_data = pd.read_csv(args.dataset)
+    evaluation_records = run_evaluation(df_eval_data, args.concurrency, args.repeats, args.checkpoint, args.resume)
+    if evaluation_records:
+        save_results(evaluation_records, args.results)
+        evaluation_summary = summarize(evaluation_records)
+        if args.baseline:
+            evaluation_summary["baseline"] = compare_with_baseline(evaluation_summary, args.baseline)
+        with open(args.summary, 'w', encoding='utf-8') as f:
+            json.dump(evaluation_summary, f, indent=2)
+        print_summary(evaluation_summary)
@@ -0,0 +1,91 @@
+import sys
+sys.path.append("../app/")
+
+import argparse
+import csv
+import json
+import time
+
+DATASET_CSV_PATH = '../evaluation/evaluation_dataset.csv'
+
+
+def load_questions(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith('.csv'):
+            return [row["Input Question"] for row in csv.DictReader(f) if row.get("Input Question")]
+        return [line.strip() for line in f if line.strip()]
+
+
+def run_sequential(questions):
+    from agent_setup import get_compiled_graph_app
+
+    agent_app = get_compiled_graph_app()
+    return [agent_app.invoke({"question": question, "chat_history": []}) for question in questions]
+
+
+def warm_answer_cache(results):
+    from agent_setup import get_answer_cache
+    from question_utils import is_context_dependent
+
+    answer_cache = get_answer_cache()
+    if answer_cache is None:
+        print("Answer cache is disabled; nothing stored.")
+        return
+    stored = 0
+    for result in results:
+        if not result.get("error") and not is_context_dependent(result["question"]):
+            answer_cache.store(result["question"], result["final_answer"], result["question_type"])
+            stored += 1
+    print(f"Stored {stored} answers in the answer cache.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Answer a file of questions in batch mode.")
+    parser.add_argument('--input', default=DATASET_CSV_PATH, help="CSV with an 'Input Question' column, or one question per line.")
+    parser.add_argument('--size', type=int, help="Repeat the questions until there are this many (e.g. 500).")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--group-size', type=int, default=10, help="Questions per grouped classification prompt.")
+    parser.add_argument('--output', help="Write one JSON line per answered question.")
+    parser.add_argument('--warm-cache', action='store_true', help="Store the answers in the semantic answer cache.")
+    parser.add_argument('--compare', action='store_true', help="Also run the sequential agent_app.invoke loop.")
+    args = parser.parse_args()
+
+    from agent_setup import get_sql_cache
+    from batch import answer_batch
+
+    questions = load_questions(args.input)
+    if args.size:
+        questions = [questions[i % len(questions)] for i in range(args.size)]
+
+    stats = {}
+    results = answer_batch(questions, concurrency=args.concurrency, group_size=args.group_size, stats=stats)
+    batch_seconds = stats["total_seconds"]
+    print(f"batch:      {len(questions)} questions in {batch_seconds:.2f}s ({len(questions) / batch_seconds:.1f} q/s), "
+          f"{stats['llm_calls']} LLM calls, {stats['router_hits']} routed locally, "
+          f"{stats['template_hits']} SQL templates, routes {stats['routes']}")
+    print(f"            classify {stats['classify_seconds']:.2f}s | sql {stats['sql_seconds']:.2f}s | "
+          f"rag {stats['rag_seconds']:.2f}s | answers {stats['answer_seconds']:.2f}s")
+
+    sql_cache = get_sql_cache()
+    if sql_cache is not None:
+        print(f"sql cache:  {sql_cache.stats()}")
+
+    if args.compare:
+        # The sequential loop starts from the same cold SQL cache as the batch run.
+        if sql_cache is not None:
+            sql_cache.clear()
+        start_time = time.perf_counter()
+        sequential_results = run_sequential(questions)
+        sequential_seconds = time.perf_counter() - start_time
+        agreement = sum(1 for a, b in zip(results, sequential_results) if a["question_type"] == b.get("question_type"))
+        print(f"sequential: {len(questions)} questions in {sequential_seconds:.2f}s "
+              f"({len(questions) / sequential_seconds:.1f} q/s)")
+        print(f"speedup {sequential_seconds / batch_seconds:.1f}x, same route for {agreement}/{len(questions)} questions")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            for result in results:
+                f.write(json.dumps(result) + "\n")
+        print(f"Wrote {len(results)} answers to {args.output}")
+    if args.warm_cache:
+        warm_answer_cache(results)
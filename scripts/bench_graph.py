@@ -0,0 +1,55 @@
+import os
+import sys
+sys.path.append("../app/")
+
+# Select the fake model before agent_setup reads its configuration.
+os.environ.setdefault('MEDIBOT_LLM_BACKEND', 'fake')
+
+import argparse
+import csv
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from agent_setup import get_compiled_graph_app
+
+DATASET_CSV_PATH = '../evaluation/evaluation_dataset.csv'
+
+
+def load_questions(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [row["Input Question"] for row in csv.DictReader(f)]
+
+
+def run_one(agent_app, question):
+    start_time = time.perf_counter()
+    state = agent_app.invoke({"question": question, "chat_history": []})
+    return time.perf_counter() - start_time, state.get("question_type")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure agent graph throughput with the offline fake LLM.")
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=8)
+    args = parser.parse_args()
+
+    print(f"LLM backend: {os.environ['MEDIBOT_LLM_BACKEND']}, "
+          f"latency {os.getenv('MEDIBOT_FAKE_LLM_LATENCY', '0')}s, tokens/s {os.getenv('MEDIBOT_FAKE_LLM_TPS', '0')}")
+    agent_app = get_compiled_graph_app()
+    questions = load_questions(DATASET_CSV_PATH)
+    workload = [questions[i % len(questions)] for i in range(args.requests)]
+
+    run_one(agent_app, workload[0])
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(lambda question: run_one(agent_app, question), workload))
+    elapsed = time.perf_counter() - start_time
+
+    latencies = [latency for latency, _ in results]
+    routes = {}
+    for _, route in results:
+        routes[route] = routes.get(route, 0) + 1
+    print(f"{args.requests} requests, concurrency {args.concurrency}: {args.requests / elapsed:.1f} req/s")
+    print(f"latency p50 {np.percentile(latencies, 50) * 1000:.1f} ms, p95 {np.percentile(latencies, 95) * 1000:.1f} ms, "
+          f"p99 {np.percentile(latencies, 99) * 1000:.1f} ms")
+    print(f"routes: {routes}")
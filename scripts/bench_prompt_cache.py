@@ -0,0 +1,108 @@
+import argparse
+import csv
+import re
+import statistics
+import sys
+sys.path.append("../app/")
+
+import ollama
+from agent_setup import CLASSIFICATION_PROMPT_TEMPLATE, SQL_PROMPT_TEMPLATE, OLLAMA_KEEP_ALIVE
+
+DATASET_CSV_PATH = '../evaluation/evaluation_dataset.csv'
+SQL_DATA_PATH = '../data/sql_setup/mydb.sql'
+OLLAMA_MODEL_NAME = "mistral:7b"
+
+# Layouts used before prompts were reordered: the question sits in front of the schema,
+# so every turn invalidates the cached prefix right after the first sentence.
+LEGACY_CLASSIFICATION_PROMPT_TEMPLATE = """Given the user question, chat history, and the database schema, classify the question into one of three categories: 'sql', 'rag', or 'general'. Use the history for context.
+
+        Chat History:
+        {chat_history}
+
+        Database Schema (Doctors and Institutions):
+        {schema}
+
+        User Question: {question}
+
+        Categories:
+        - 'sql': The question asks for specific information *only* about doctors or institutions based on the schema (e.g., names, specializations, addresses, counts). Consider the history for pronoun resolution (e.g., 'their specialization').
+        - 'rag': The question asks about general medical topics, diseases, symptoms, causes, treatments, prevention, wellness, etc. These answers are likely found in general medical summaries, not the specific database schema provided. Consider history for follow-up questions on medical topics.
+        - 'general': The question is a greeting, small talk, asks about the AI itself, or is completely unrelated to medicine or the specific doctors/institutions in the database.
+
+        Classification (respond with only 'sql', 'rag', or 'general'):"""
+
+LEGACY_SQL_PROMPT_TEMPLATE = """You are an expert in SQL. Write a SQL query based on the following question and schema. Do NOT use chat history for SQL generation, only the current question.
+
+            Database Schema:
+            {schema}
+
+            Question:
+            {question}
+
+            Instructions:
+            - Use PostgreSQL syntax.
+            - Relevant tables: `doctors`, `institutions`. Do NOT prefix table names.
+            - Use `ILIKE '%query%'` for case-insensitive text matching (e.g., `full_name`, `specialization`).
+            - Join `doctors` and `institutions` using `doctors.institution_id = institutions.id` if needed.
+            - Return only the raw SQL query, no explanations or markdown.
+
+            SQL Query:"""
+
+
+def load_questions(path, limit):
+    with open(path, 'r', encoding='utf-8') as f:
+        questions = [row["Input Question"] for row in csv.DictReader(f)]
+    return questions[:limit]
+
+
+def load_schema(path):
+    # Stand-in for SQLDatabase.get_table_info(): the CREATE TABLE statements from the seed file.
+    with open(path, 'r', encoding='utf-8') as f:
+        return "\n\n".join(re.findall(r"CREATE TABLE .*?\);", f.read(), flags=re.DOTALL))
+
+
+def run_layout(client, model, template, questions, schema, max_tokens):
+    prompt_eval_ms, prompt_eval_tokens = [], []
+    for i, question in enumerate(questions):
+        prompt = template.format(schema=schema, chat_history="", question=question)
+        response = client.chat(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            options={"temperature": 0.2, "num_predict": max_tokens},
+            keep_alive=OLLAMA_KEEP_ALIVE,
+        )
+        # The first call of a layout warms the cache and is not counted.
+        if i == 0:
+            continue
+        prompt_eval_ms.append((response.get("prompt_eval_duration") or 0) / 1e6)
+        prompt_eval_tokens.append(response.get("prompt_eval_count") or 0)
+    return prompt_eval_ms, prompt_eval_tokens
+
+
+def report(name, prompt_eval_ms, prompt_eval_tokens):
+    print(f"{name:<28} prompt eval: mean {statistics.mean(prompt_eval_ms):8.1f} ms, "
+          f"median {statistics.median(prompt_eval_ms):8.1f} ms, "
+          f"mean tokens evaluated {statistics.mean(prompt_eval_tokens):6.1f}")
+    return statistics.mean(prompt_eval_ms)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure Ollama prompt-eval time for the legacy and prefix-first prompt layouts.")
+    parser.add_argument('--model', default=OLLAMA_MODEL_NAME)
+    parser.add_argument('--questions', type=int, default=15)
+    parser.add_argument('--max-tokens', type=int, default=8)
+    args = parser.parse_args()
+
+    client = ollama.Client()
+    schema = load_schema(SQL_DATA_PATH)
+    questions = load_questions(DATASET_CSV_PATH, args.questions)
+
+    for label, legacy_template, template in (
+        ("classification", LEGACY_CLASSIFICATION_PROMPT_TEMPLATE, CLASSIFICATION_PROMPT_TEMPLATE),
+        ("sql generation", LEGACY_SQL_PROMPT_TEMPLATE, SQL_PROMPT_TEMPLATE),
+    ):
+        legacy_mean = report(f"{label} (legacy)", *run_layout(client, args.model, legacy_template, questions, schema, args.max_tokens))
+        prefix_mean = report(f"{label} (prefix-first)", *run_layout(client, args.model, template, questions, schema, args.max_tokens))
+        if legacy_mean > 0:
+            print(f"{label}: prompt eval time saved per call {legacy_mean - prefix_mean:.1f} ms "
+                  f"({(legacy_mean - prefix_mean) / legacy_mean:.0%})\n")
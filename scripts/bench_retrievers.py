@@ -0,0 +1,93 @@
+import sys
+sys.path.append("../app/")
+
+import argparse
+import csv
+import json
+import os
+import subprocess
+import time
+
+PERSIST_DIRECTORY = '../vector_store/db_chroma'
+NUMPY_STORE_DIRECTORY = '../vector_store/numpy_store'
+DATASET_CSV_PATH = '../evaluation/evaluation_dataset.csv'
+
+
+def rss_mb():
+    import psutil
+    return psutil.Process(os.getpid()).memory_info().rss / (1024 * 1024)
+
+
+def load_questions(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [row["Input Question"] for row in csv.DictReader(f)]
+
+
+def measure(backend, k, rounds):
+    import numpy as np
+    from embeddings_backend import load_embeddings
+
+    # The embedding model is shared by both backends, so it is loaded and the
+    # queries are encoded before the baseline; only the store itself is measured.
+    embeddings = load_embeddings()
+    query_vectors = embeddings.embed_documents(load_questions(DATASET_CSV_PATH))
+    baseline_rss = rss_mb()
+
+    start_time = time.perf_counter()
+    if backend == "chroma":
+        from langchain_community.vectorstores import Chroma
+        vectordb = Chroma(persist_directory=PERSIST_DIRECTORY, embedding_function=embeddings)
+        vectordb.similarity_search_by_vector(query_vectors[0], k=k)
+        search_one = lambda vector: vectordb.similarity_search_by_vector(vector, k=k)
+        search_batch = None
+    else:
+        from numpy_store import NumpyVectorStore
+        store = NumpyVectorStore.load(NUMPY_STORE_DIRECTORY)
+        store.search(np.asarray(query_vectors[0]), k)
+        search_one = lambda vector: store.search(np.asarray(vector), k)
+        search_batch = lambda vectors: store.search(np.asarray(vectors), k)
+    load_seconds = time.perf_counter() - start_time
+
+    latencies = []
+    for _ in range(rounds):
+        for vector in query_vectors:
+            query_start = time.perf_counter()
+            search_one(vector)
+            latencies.append(time.perf_counter() - query_start)
+
+    result = {
+        "backend": backend,
+        "load_ms": load_seconds * 1000,
+        "query_p50_ms": float(np.percentile(latencies, 50)) * 1000,
+        "query_p95_ms": float(np.percentile(latencies, 95)) * 1000,
+        "rss_delta_mb": rss_mb() - baseline_rss,
+    }
+    if search_batch is not None:
+        batch_start = time.perf_counter()
+        for _ in range(rounds):
+            search_batch(query_vectors)
+        result["batch_ms_per_query"] = (time.perf_counter() - batch_start) * 1000 / (rounds * len(query_vectors))
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the Chroma and NumPy vector search backends.")
+    parser.add_argument('--k', type=int, default=3)
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--backend', choices=['chroma', 'numpy'], help="Measure one backend in this process.")
+    args = parser.parse_args()
+
+    if args.backend:
+        print(json.dumps(measure(args.backend, args.k, args.rounds)))
+    else:
+        # Each backend runs in a fresh interpreter so load time and RSS are not shared.
+        for backend in ("chroma", "numpy"):
+            output = subprocess.run(
+                [sys.executable, __file__, '--backend', backend, '--k', str(args.k), '--rounds', str(args.rounds)],
+                capture_output=True, text=True, check=True).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            line = (f"{backend:<7} load {result['load_ms']:8.1f} ms | query p50 {result['query_p50_ms']:7.3f} ms "
+                    f"p95 {result['query_p95_ms']:7.3f} ms | RSS +{result['rss_delta_mb']:6.1f} MB")
+            if "batch_ms_per_query" in result:
+                line += f" | batched {result['batch_ms_per_query']:.3f} ms/query"
+            print(line)
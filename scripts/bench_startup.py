@@ -0,0 +1,63 @@
+import sys
+sys.path.append("../app/")
+
+import argparse
+import json
+import os
+import subprocess
+import time
+
+APP_DIRECTORY = '../app'
+APP_SCRIPT = 'streamlit_app.py'
+# Modules that must not be imported before the first question is asked.
+HEAVY_MODULES = ("torch", "whisper", "transformers", "sentence_transformers", "chromadb")
+
+
+def measure(timeout):
+    from streamlit.testing.v1 import AppTest
+
+    # The app resolves its data paths relative to app/.
+    os.chdir(APP_DIRECTORY)
+    start_time = time.perf_counter()
+    app_test = AppTest.from_file(APP_SCRIPT, default_timeout=timeout)
+    app_test.run()
+    return {
+        "first_render_seconds": time.perf_counter() - start_time,
+        "errors": [str(exception.value) for exception in app_test.exception],
+        "heavy_modules": [name for name in HEAVY_MODULES if name in sys.modules],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the cold start of the Streamlit app up to its first render.")
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--timeout', type=float, default=120)
+    parser.add_argument('--max-seconds', type=float, help="Exit with status 1 if the median cold start is slower.")
+    parser.add_argument('--single', action='store_true', help="Measure one cold start in this process.")
+    args = parser.parse_args()
+
+    if args.single:
+        print(json.dumps(measure(args.timeout)))
+        exit(0)
+
+    # Every run is a fresh interpreter, so nothing is shared between cold starts.
+    timings = []
+    ok = True
+    for run in range(args.runs):
+        start_time = time.perf_counter()
+        output = subprocess.run([sys.executable, __file__, '--single', '--timeout', str(args.timeout)],
+                                capture_output=True, text=True, check=True).stdout
+        total_seconds = time.perf_counter() - start_time
+        result = json.loads(output.strip().splitlines()[-1])
+        timings.append(total_seconds)
+        print(f"run {run + 1}: process {total_seconds:.2f}s, first render {result['first_render_seconds']:.2f}s"
+              + (f" | heavy modules loaded: {', '.join(result['heavy_modules'])}" if result['heavy_modules'] else "")
+              + (f" | errors: {result['errors']}" if result['errors'] else ""))
+        ok = ok and not result['errors'] and not result['heavy_modules']
+
+    median = sorted(timings)[len(timings) // 2]
+    print(f"cold start median {median:.2f}s over {len(timings)} runs")
+    if args.max_seconds is not None and median > args.max_seconds:
+        print(f"FAILED: median cold start exceeds the {args.max_seconds:.2f}s budget")
+        ok = False
+    exit(0 if ok else 1)
@@ -0,0 +1,289 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+sys.path.append("../app/")
+
+from embeddings_backend import EMBEDDING_MODEL_NAME, EMBEDDINGS_BACKEND
+
+ARTICLES_DIR = '../data/med_articles/'
+PERSIST_DIRECTORY = '../vector_store/db_chroma'
+MANIFEST_PATH = os.path.join(PERSIST_DIRECTORY, 'manifest.json')
+BM25_INDEX_PATH = '../vector_store/bm25_index.json'
+NUMPY_STORE_DIRECTORY = '../vector_store/numpy_store'
+NUMPY_STORE_DTYPE = 'float16'
+COLLECTION_NAME = 'langchain'
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 100
+ENCODE_BATCH_SIZE = 64
+MANIFEST_VERSION = 1
+
+_worker_model = None
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(65536), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def scan_articles(articles_dir):
+    articles = {}
+    for name in sorted(os.listdir(articles_dir)):
+        if name.endswith('.txt'):
+            articles[name] = file_sha256(os.path.join(articles_dir, name))
+    return articles
+
+
+def load_manifest(path):
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (IOError, ValueError) as e:
+        print(f"Warning: could not read manifest {path}: {e}")
+        return None
+
+
+def save_manifest(manifest, path):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def manifest_settings():
+    return {
+        "manifest_version": MANIFEST_VERSION,
+        "embedding_model": EMBEDDING_MODEL_NAME,
+        "embedding_backend": EMBEDDINGS_BACKEND,
+        # ONNX vectors used to be stored without the model's L2 normalization; such indexes are rebuilt.
+        "embedding_normalized": True,
+        "chunk_size": CHUNK_SIZE,
+        "chunk_overlap": CHUNK_OVERLAP,
+    }
+
+
+def index_version(files):
+    # Content hash of the whole corpus; changes whenever any article changes.
+    digest = hashlib.sha256()
+    for name in sorted(files):
+        digest.update(name.encode('utf-8'))
+        digest.update(files[name]["sha256"].encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def split_article(name, articles_dir):
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    path = os.path.join(articles_dir, name)
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    chunks = splitter.split_text(text)
+    ids = [f"{name}:{i}" for i in range(len(chunks))]
+    metadatas = [{"source": path, "article": name, "chunk": i} for i in range(len(chunks))]
+    return ids, chunks, metadatas
+
+
+# Process pool workers
+def _init_worker(backend, num_threads):
+    global _worker_model
+    from embeddings_backend import load_embeddings
+
+    _worker_model = load_embeddings(backend, num_threads=num_threads)
+
+
+def _encode_batch(texts):
+    return _worker_model.embed_documents(texts)
+
+
+def encode_texts(texts, workers):
+    if not texts:
+        return []
+    batches = [texts[i:i + ENCODE_BATCH_SIZE] for i in range(0, len(texts), ENCODE_BATCH_SIZE)]
+    if workers <= 1 or len(batches) == 1:
+        _init_worker(EMBEDDINGS_BACKEND, None)
+        return [vector for batch in batches for vector in _encode_batch(batch)]
+    embeddings = []
+    # Each worker gets one core so the pool does not oversubscribe the CPU.
+    with ProcessPoolExecutor(max_workers=min(workers, len(batches)), initializer=_init_worker, initargs=(EMBEDDINGS_BACKEND, 1)) as pool:
+        # map() keeps batch order, so vectors line up with the input texts.
+        for batch_vectors in pool.map(_encode_batch, batches):
+            embeddings.extend(batch_vectors)
+    return embeddings
+
+
+def open_collection(persist_directory, rebuild):
+    import chromadb
+
+    client = chromadb.PersistentClient(path=persist_directory)
+    if rebuild:
+        try:
+            client.delete_collection(COLLECTION_NAME)
+        except Exception:
+            pass
+    return client.get_or_create_collection(COLLECTION_NAME)
+
+
+def plan_changes(current_files, manifest, rebuild):
+    if rebuild or manifest is None:
+        return sorted(current_files), []
+    previous_files = manifest.get("files", {})
+    changed = [name for name, sha in current_files.items()
+               if previous_files.get(name, {}).get("sha256") != sha]
+    removed = [name for name in previous_files if name not in current_files]
+    return sorted(changed), sorted(removed)
+
+
+def build_index(articles_dir, persist_directory, workers, rebuild=False, numpy_dtype=NUMPY_STORE_DTYPE):
+    start_time = time.time()
+    manifest_path = os.path.join(persist_directory, 'manifest.json')
+    os.makedirs(persist_directory, exist_ok=True)
+
+    manifest = load_manifest(manifest_path)
+    if manifest is not None and {k: manifest.get(k) for k in manifest_settings()} != manifest_settings():
+        print("Embedding model or chunking settings changed since last build. Rebuilding from scratch.")
+        rebuild = True
+    if manifest is None and not rebuild:
+        print("No manifest found. Building the index from scratch.")
+        rebuild = True
+
+    current_files = scan_articles(articles_dir)
+    changed, removed = plan_changes(current_files, manifest, rebuild)
+    print(f"Articles: {len(current_files)} total, {len(changed)} new/changed, {len(removed)} removed.")
+
+    previous_files = {} if rebuild else manifest.get("files", {})
+    if not changed and not removed:
+        print("Index is up to date.")
+        if not os.path.exists(BM25_INDEX_PATH):
+            build_bm25_index(open_collection(persist_directory, rebuild=False), manifest["index_version"])
+        stored = numpy_store_settings(NUMPY_STORE_DIRECTORY)
+        if stored != {"dtype": numpy_dtype, "index_version": manifest["index_version"]}:
+            build_numpy_store(open_collection(persist_directory, rebuild=False), manifest["index_version"], numpy_dtype)
+        return manifest
+
+    collection = open_collection(persist_directory, rebuild)
+
+    stale_ids = []
+    for name in removed + changed:
+        stale_ids.extend(previous_files.get(name, {}).get("ids", []))
+    if stale_ids:
+        collection.delete(ids=stale_ids)
+
+    all_ids, all_chunks, all_metadatas = [], [], []
+    files = {name: previous_files[name] for name in previous_files if name in current_files and name not in changed}
+    for name in changed:
+        ids, chunks, metadatas = split_article(name, articles_dir)
+        all_ids.extend(ids)
+        all_chunks.extend(chunks)
+        all_metadatas.extend(metadatas)
+        files[name] = {"sha256": current_files[name], "ids": ids}
+
+    print(f"Encoding {len(all_chunks)} chunks with {workers} worker(s)...")
+    encode_start = time.time()
+    embeddings = encode_texts(all_chunks, workers)
+    print(f"Encoded in {time.time() - encode_start:.2f}s")
+
+    for i in range(0, len(all_ids), 500):
+        collection.upsert(
+            ids=all_ids[i:i + 500],
+            embeddings=embeddings[i:i + 500],
+            documents=all_chunks[i:i + 500],
+            metadatas=all_metadatas[i:i + 500],
+        )
+
+    manifest = manifest_settings()
+    manifest["files"] = files
+    manifest["index_version"] = index_version(files)
+    manifest["chunk_count"] = sum(len(entry["ids"]) for entry in files.values())
+    manifest["built_at"] = time.strftime('%Y-%m-%dT%H:%M:%S')
+    save_manifest(manifest, manifest_path)
+    build_bm25_index(collection, manifest["index_version"])
+    build_numpy_store(collection, manifest["index_version"], numpy_dtype)
+    print(f"Index version {manifest['index_version']} written in {time.time() - start_time:.2f}s")
+    return manifest
+
+
+def build_bm25_index(collection, version, path=BM25_INDEX_PATH):
+    from bm25_index import BM25Index
+
+    # Built from the collection itself so BM25 and dense search rank the same chunks.
+    start_time = time.time()
+    contents = collection.get(include=["documents", "metadatas"])
+    order = sorted(range(len(contents["ids"])), key=lambda i: contents["ids"][i])
+    texts = [contents["documents"][i] for i in order]
+    metadatas = [contents["metadatas"][i] for i in order]
+    BM25Index.build(texts, metadatas, index_version=version).save(path)
+    print(f"BM25 index over {len(texts)} chunks written to {path} in {time.time() - start_time:.2f}s")
+
+
+def numpy_store_settings(directory=NUMPY_STORE_DIRECTORY):
+    # dtype and index version of the existing store, or None when there is none.
+    from numpy_store import DOCUMENTS_FILE
+
+    try:
+        with open(os.path.join(directory, DOCUMENTS_FILE), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (IOError, ValueError):
+        return None
+    return {"dtype": data.get("dtype"), "index_version": data.get("index_version")}
+
+
+def build_numpy_store(collection, version, dtype, directory=NUMPY_STORE_DIRECTORY):
+    import numpy as np
+    from numpy_store import NumpyVectorStore
+
+    start_time = time.time()
+    contents = collection.get(include=["embeddings", "documents", "metadatas"])
+    order = sorted(range(len(contents["ids"])), key=lambda i: contents["ids"][i])
+    embeddings = np.asarray([contents["embeddings"][i] for i in order], dtype=np.float32)
+    texts = [contents["documents"][i] for i in order]
+    metadatas = [contents["metadatas"][i] for i in order]
+    NumpyVectorStore.build(directory, embeddings, texts, metadatas, dtype=dtype, index_version=version)
+    print(f"NumPy {dtype} store over {len(texts)} chunks written to {directory} in {time.time() - start_time:.2f}s")
+
+
+def check_index(articles_dir, persist_directory):
+    manifest = load_manifest(os.path.join(persist_directory, 'manifest.json'))
+    if manifest is None:
+        print("Check failed: no manifest found.")
+        return False
+    ok = True
+    current_files = scan_articles(articles_dir)
+    changed, removed = plan_changes(current_files, manifest, rebuild=False)
+    if changed or removed:
+        print(f"Check failed: {len(changed)} new/changed and {len(removed)} removed articles are not indexed.")
+        ok = False
+    collection = open_collection(persist_directory, rebuild=False)
+    if collection.count() != manifest.get("chunk_count"):
+        print(f"Check failed: collection has {collection.count()} chunks, manifest expects {manifest.get('chunk_count')}.")
+        ok = False
+    if index_version(manifest.get("files", {})) != manifest.get("index_version"):
+        print("Check failed: manifest index_version does not match its file hashes.")
+        ok = False
+    if ok:
+        print(f"Index OK: version {manifest['index_version']}, {manifest['chunk_count']} chunks.")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or refresh the Chroma index over the medical articles.")
+    parser.add_argument('--articles-dir', default=ARTICLES_DIR)
+    parser.add_argument('--persist-directory', default=PERSIST_DIRECTORY)
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) - 1))
+    parser.add_argument('--rebuild', action='store_true', help="Drop the collection and re-embed every article.")
+    parser.add_argument('--check', action='store_true', help="Verify the index matches the articles without changing it.")
+    parser.add_argument('--numpy-dtype', choices=['float16', 'int8'], default=NUMPY_STORE_DTYPE,
+                        help="Storage type of the memory-mapped NumPy vector store.")
+    args = parser.parse_args()
+
+    if args.check:
+        exit(0 if check_index(args.articles_dir, args.persist_directory) else 1)
+    build_index(args.articles_dir, args.persist_directory, args.workers, rebuild=args.rebuild, numpy_dtype=args.numpy_dtype)
@@ -0,0 +1,127 @@
+import sys
+sys.path.append("../app/")
+
+import argparse
+import os
+import random
+import time
+
+import numpy as np
+from embeddings_backend import EMBEDDING_MODEL_NAME, ONNX_MODEL_DIRECTORY
+
+ARTICLES_DIR = '../data/med_articles/'
+DATASET_CSV_PATH = '../evaluation/evaluation_dataset.csv'
+ONNX_OPSET = 14
+MIN_COSINE = {"onnx": 0.999, "onnx-int8": 0.98}
+# Chroma ranks by L2 distance, so the vectors must also have the reference's length (unit, for this model).
+MAX_NORM_DIFFERENCE = 1e-3
+
+
+def export_model(output_dir):
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    os.makedirs(output_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(EMBEDDING_MODEL_NAME)
+    model = AutoModel.from_pretrained(EMBEDDING_MODEL_NAME).eval()
+    # Writes tokenizer.json, which is all OnnxEmbeddings needs at runtime.
+    tokenizer.save_pretrained(output_dir)
+
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (sample["input_ids"], sample["attention_mask"], sample["token_type_ids"]),
+            os.path.join(output_dir, 'model.onnx'),
+            input_names=["input_ids", "attention_mask", "token_type_ids"],
+            output_names=["last_hidden_state"],
+            dynamic_axes={name: {0: "batch", 1: "sequence"} for name in ("input_ids", "attention_mask", "token_type_ids", "last_hidden_state")},
+            opset_version=ONNX_OPSET,
+        )
+    print(f"Exported {EMBEDDING_MODEL_NAME} to {output_dir}/model.onnx")
+
+
+def quantize_model(output_dir):
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(
+        os.path.join(output_dir, 'model.onnx'),
+        os.path.join(output_dir, 'model_int8.onnx'),
+        weight_type=QuantType.QInt8,
+    )
+    print(f"Wrote int8 dynamic-quantized model to {output_dir}/model_int8.onnx")
+
+
+def parity_texts(sample_size, seed=0):
+    import csv
+
+    with open(DATASET_CSV_PATH, 'r', encoding='utf-8') as f:
+        texts = [row["Input Question"] for row in csv.DictReader(f)]
+    names = sorted(os.listdir(ARTICLES_DIR))
+    random.Random(seed).shuffle(names)
+    for name in names[:sample_size]:
+        with open(os.path.join(ARTICLES_DIR, name), 'r', encoding='utf-8') as f:
+            texts.append(f.read()[:2000])
+    return texts
+
+
+def cosine_rows(a, b):
+    a = np.asarray(a, dtype=np.float32)
+    b = np.asarray(b, dtype=np.float32)
+    return (a * b).sum(axis=1) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1))
+
+
+def norm_differences(a, b):
+    return np.abs(np.linalg.norm(np.asarray(a, dtype=np.float32), axis=1)
+                  - np.linalg.norm(np.asarray(b, dtype=np.float32), axis=1))
+
+
+def l2_distances(a, b):
+    return np.linalg.norm(np.asarray(a, dtype=np.float32) - np.asarray(b, dtype=np.float32), axis=1)
+
+
+def parity_check(sample_size, model_dir):
+    from embeddings_backend import load_embeddings
+    from onnx_embeddings import OnnxEmbeddings
+
+    texts = parity_texts(sample_size)
+    reference_model = load_embeddings("huggingface")
+    start_time = time.perf_counter()
+    reference = reference_model.embed_documents(texts)
+    print(f"huggingface: {len(texts)} texts in {time.perf_counter() - start_time:.2f}s")
+
+    ok = True
+    for backend in ("onnx", "onnx-int8"):
+        model = OnnxEmbeddings(model_dir, quantized=backend == "onnx-int8")
+        start_time = time.perf_counter()
+        vectors = model.embed_documents(texts)
+        elapsed = time.perf_counter() - start_time
+        query_start = time.perf_counter()
+        query_vectors = [model.embed_query(text) for text in texts[:20]]
+        query_ms = (time.perf_counter() - query_start) * 1000 / len(query_vectors)
+        similarities = cosine_rows(reference, vectors)
+        query_similarities = cosine_rows(reference[:20], query_vectors)
+        norm_difference = max(norm_differences(reference, vectors).max(),
+                              norm_differences(reference[:20], query_vectors).max())
+        distances = l2_distances(reference, vectors)
+        passed = (min(similarities.min(), query_similarities.min()) >= MIN_COSINE[backend]
+                  and norm_difference <= MAX_NORM_DIFFERENCE)
+        ok = ok and passed
+        print(f"{backend:<10} {len(texts)} texts in {elapsed:.2f}s, {query_ms:.1f} ms/query | cosine vs PyTorch: "
+              f"min {similarities.min():.5f}, mean {similarities.mean():.5f}, query min {query_similarities.min():.5f}; "
+              f"max norm difference {norm_difference:.2e}, max L2 distance {distances.max():.4f} "
+              f"-> {'OK' if passed else 'FAILED'} (thresholds cosine {MIN_COSINE[backend]}, norm {MAX_NORM_DIFFERENCE})")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export all-MiniLM-L6-v2 to ONNX, quantize it and check parity.")
+    parser.add_argument('--output-dir', default=ONNX_MODEL_DIRECTORY)
+    parser.add_argument('--skip-export', action='store_true', help="Only run the parity check on existing models.")
+    parser.add_argument('--sample-size', type=int, default=100, help="Number of articles used in the parity check.")
+    args = parser.parse_args()
+
+    if not args.skip_export:
+        export_model(args.output_dir)
+        quantize_model(args.output_dir)
+    exit(0 if parity_check(args.sample_size, args.output_dir) else 1)
@@ -0,0 +1,132 @@
+import sys
+sys.path.append("../app/")
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import subprocess
+import time
+
+import numpy as np
+
+DATASET_CSV_PATH = '../evaluation/evaluation_dataset.csv'
+APP_DIRECTORY = '../app'
+DEFAULT_PORT = 8765
+
+
+def load_questions(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [row["Input Question"] for row in csv.DictReader(f)]
+
+
+def start_server(port, concurrency, queue):
+    # Serves app/api.py with the offline fake model, so the numbers measure the
+    # service itself rather than an LLM.
+    env = dict(os.environ)
+    env.setdefault('MEDIBOT_LLM_BACKEND', 'fake')
+    env['MEDIBOT_API_MAX_CONCURRENCY'] = str(concurrency)
+    env['MEDIBOT_API_MAX_QUEUE'] = str(queue)
+    return subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'api:app', '--port', str(port), '--log-level', 'warning'],
+        cwd=APP_DIRECTORY, env=env, stdout=subprocess.DEVNULL)
+
+
+async def wait_until_ready(client, url, timeout=120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get(f"{url}/health")).status_code == 200:
+                return
+        except Exception:
+            pass
+        await asyncio.sleep(0.5)
+    raise RuntimeError(f"API at {url} did not become ready within {timeout}s")
+
+
+async def stream_question(client, url, session_id, question):
+    # Returns (status, seconds to first token, total seconds, session_id).
+    start_time = time.perf_counter()
+    first_token = None
+    async with client.stream('POST', f"{url}/chat/stream",
+                             json={"question": question, "session_id": session_id}) as response:
+        if response.status_code != 200:
+            await response.aread()
+            return response.status_code, None, time.perf_counter() - start_time, session_id
+        session_id = response.headers.get("X-Session-Id", session_id)
+        event = None
+        async for line in response.aiter_lines():
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: ") and event == "token" and first_token is None:
+                first_token = time.perf_counter() - start_time
+            elif line.startswith("data: ") and event == "error":
+                return "error", first_token, time.perf_counter() - start_time, session_id
+    return 200, first_token, time.perf_counter() - start_time, session_id
+
+
+async def run_session(client, url, questions, turns, offset, results):
+    session_id = None
+    for turn in range(turns):
+        question = questions[(offset + turn) % len(questions)]
+        status, first_token, total, session_id = await stream_question(client, url, session_id, question)
+        results.append({"status": status, "first_token": first_token, "total": total})
+
+
+def print_report(results, elapsed, sessions):
+    ok = [r for r in results if r["status"] == 200]
+    statuses = {}
+    for r in results:
+        statuses[str(r["status"])] = statuses.get(str(r["status"]), 0) + 1
+    print(f"{len(results)} requests from {sessions} concurrent sessions in {elapsed:.2f}s: "
+          f"{len(ok) / elapsed:.1f} successful req/s | status counts {statuses}")
+    if ok:
+        totals = [r["total"] for r in ok]
+        first_tokens = [r["first_token"] for r in ok if r["first_token"] is not None]
+        print(f"latency      p50 {np.percentile(totals, 50) * 1000:8.1f} ms  p95 {np.percentile(totals, 95) * 1000:8.1f} ms  "
+              f"p99 {np.percentile(totals, 99) * 1000:8.1f} ms")
+        if first_tokens:
+            print(f"first token  p50 {np.percentile(first_tokens, 50) * 1000:8.1f} ms  "
+                  f"p95 {np.percentile(first_tokens, 95) * 1000:8.1f} ms  p99 {np.percentile(first_tokens, 99) * 1000:8.1f} ms")
+
+
+async def main(args):
+    import httpx
+
+    server = None
+    url = args.url
+    if url is None:
+        url = f"http://127.0.0.1:{args.port}"
+        server = start_server(args.port, args.server_concurrency, args.server_queue)
+    try:
+        limits = httpx.Limits(max_connections=args.sessions, max_keepalive_connections=args.sessions)
+        async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+            await wait_until_ready(client, url)
+            questions = load_questions(DATASET_CSV_PATH)
+            # One warm-up request so model loading is not part of the measurement.
+            await stream_question(client, url, None, questions[0])
+            results = []
+            start_time = time.perf_counter()
+            await asyncio.gather(*(run_session(client, url, questions, args.turns, i * args.turns, results)
+                                   for i in range(args.sessions)))
+            elapsed = time.perf_counter() - start_time
+            print_report(results, elapsed, args.sessions)
+            print(f"server: {json.dumps((await client.get(f'{url}/health')).json())}")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the MediBot HTTP API with concurrent streaming sessions.")
+    parser.add_argument('--sessions', type=int, default=16, help="Concurrent client sessions.")
+    parser.add_argument('--turns', type=int, default=5, help="Questions asked per session, one after another.")
+    parser.add_argument('--url', help="Test a running API instead of starting one with the fake model.")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--server-concurrency', type=int, default=8)
+    parser.add_argument('--server-queue', type=int, default=32)
+    parser.add_argument('--timeout', type=float, default=120)
+    args = parser.parse_args()
+    asyncio.run(main(args))
@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+APP_DIRECTORY = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'app'))
+sys.path.append(APP_DIRECTORY)
+
+# Read when agent_setup is imported: offline LLM and an in-memory database.
+os.environ.setdefault('MEDIBOT_LLM_BACKEND', 'fake')
+os.environ.setdefault('MEDIBOT_DATABASE_URL', 'sqlite://')
+
+
+@pytest.fixture(autouse=True)
+def app_directory(monkeypatch):
+    # The app resolves its resources ('../vector_store/...') relative to app/.
+    monkeypatch.chdir(APP_DIRECTORY)
@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+import api
+import batch
+import fake_llm
+from agent_setup import get_compiled_graph_app
+from answer_cache import SemanticAnswerCache
+
+QUESTION = "What is the capital of France?"
+
+
+class RecordingCache:
+    def __init__(self):
+        self.stored = []
+
+    def lookup(self, question):
+        return None
+
+    def store(self, question, final_answer, question_type):
+        self.stored.append((question, final_answer, question_type))
+
+
+@pytest.fixture
+def failing_answers(monkeypatch):
+    # Classification still works; every answer generation raises.
+    respond = fake_llm.FakeChatModel._respond
+
+    def fail_answers(self, prompt):
+        if "Classification" in prompt:
+            return respond(self, prompt)
+        raise RuntimeError("model unavailable")
+
+    monkeypatch.setattr(fake_llm.FakeChatModel, "_respond", fail_answers)
+
+
+def collect_events(question, answer_cache, monkeypatch):
+    monkeypatch.setattr(api, "get_answer_cache", lambda: answer_cache)
+
+    async def run():
+        return [event async for event in api.answer_events(question, "test-session", api.Session(None))]
+
+    return asyncio.run(run())
+
+
+def test_failed_generation_sets_error(failing_answers):
+    result = get_compiled_graph_app().invoke({"question": QUESTION, "chat_history": []})
+    assert result["final_answer"].startswith("Failed to generate")
+    assert "model unavailable" in result["error"]
+
+
+def test_api_does_not_cache_failed_generation(failing_answers, monkeypatch):
+    answer_cache = RecordingCache()
+    events = collect_events(QUESTION, answer_cache, monkeypatch)
+    final = dict(events)["final"]
+    assert final["answer"].startswith("Failed to generate")
+    assert final["error"]
+    assert answer_cache.stored == []
+
+
+def test_api_caches_successful_generation(monkeypatch):
+    answer_cache = RecordingCache()
+    events = collect_events(QUESTION, answer_cache, monkeypatch)
+    final = dict(events)["final"]
+    assert final["error"] is None
+    assert answer_cache.stored == [(QUESTION, final["answer"], final["route"])]
+
+
+def test_batch_marks_failed_generation(failing_answers):
+    [result] = batch.answer_batch([QUESTION], concurrency=1)
+    assert result["final_answer"].startswith("Failed to generate")
+    assert "model unavailable" in result["error"]
+
+
+class ConstantEmbeddings:
+    def embed_query(self, question):
+        return [1.0, 0.0]
+
+
+def test_data_version_change_drops_cached_answers(tmp_path):
+    versions = ["1"]
+    answer_cache = SemanticAnswerCache(ConstantEmbeddings(), path=str(tmp_path / "answers.sqlite3"), data_version="1",
+                                       version_source=lambda: versions[-1], version_check_seconds=0)
+    answer_cache.store(QUESTION, "Paris.", "general")
+    assert answer_cache.lookup(QUESTION)["final_answer"] == "Paris."
+    versions.append("2")
+    assert answer_cache.lookup(QUESTION) is None
+    assert answer_cache.stats["invalidations"] == 1
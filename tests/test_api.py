@@ -0,0 +1,16 @@
+import asyncio
+
+import api
+
+
+def test_evict_skips_busy_sessions():
+    async def run():
+        store = api.SessionStore(max_sessions=2, ttl_seconds=3600)
+        _, busy = store.get("busy")
+        await busy.lock.acquire()
+        store.get("second")
+        # "busy" is the oldest but mid-turn: the next oldest goes instead.
+        store.get("third")
+        return list(store._sessions)
+
+    assert asyncio.run(run()) == ["busy", "third"]
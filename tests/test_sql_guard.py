@@ -0,0 +1,96 @@
+import pytest
+from sqlalchemy import create_engine
+
+from sql_guard import SQLGuard, SQLGuardError, check_read_only, limit_rows
+
+ALLOWED = [
+    "SELECT doctor_name, specialization FROM doctors WHERE specialization = 'Neurology'",
+    "SELECT doctor_name FROM doctors WHERE specialization = :specialization",
+    "WITH counts AS (SELECT specialization, COUNT(*) AS n FROM doctors GROUP BY specialization) "
+    "SELECT * FROM counts ORDER BY n DESC",
+    "SELECT doctor_name FROM doctors WHERE doctor_name = 'Drop Table; DELETE FROM doctors'",
+    "-- generated\nSELECT COUNT(*) FROM doctors;",
+    # Columns and aliases that share a name with a keyword.
+    "SELECT comment, set, lock, do, analyze FROM notes",
+    "SELECT doctor_name AS comment, specialization AS set FROM doctors",
+    "SELECT COUNT(comment) FROM notes WHERE lock = 1 AND analyze IS NOT NULL",
+    "SELECT \"into\", \"update\" FROM notes",
+    "SELECT key, share FROM settings WHERE no = 1",
+]
+
+REJECTED = [
+    ("DELETE FROM doctors", "Only SELECT"),
+    ("UPDATE doctors SET doctor_name = 'x'", "Only SELECT"),
+    ("", "empty"),
+    ("SELECT 1; DROP TABLE doctors", "single SQL statement"),
+    ("SELECT 1 /* ; */; UPDATE doctors SET doctor_name = 'x'", "single SQL statement"),
+    ("WITH gone AS (DELETE FROM doctors RETURNING *) SELECT * FROM gone", "DELETE"),
+    ("WITH moved AS MATERIALIZED (INSERT INTO archive SELECT * FROM doctors RETURNING id) SELECT 1", "INSERT"),
+    ("WITH x AS (SELECT 1) UPDATE doctors SET doctor_name = 1", "UPDATE"),
+    ("WITH x AS (SELECT 1) DELETE FROM doctors", "DELETE"),
+    ("SELECT lo_unlink(16384)", "lo_unlink"),
+    ("SELECT * INTO doctors_copy FROM doctors", "INTO"),
+    ("SELECT * FROM doctors FOR UPDATE", "FOR UPDATE"),
+    ("SELECT * FROM doctors FOR NO KEY UPDATE", "FOR NO"),
+    ("SELECT pg_sleep(30)", "pg_sleep"),
+    ("SELECT \"pg_sleep\"(30)", "pg_sleep"),
+    ("SELECT pg_catalog.pg_sleep(30)", "pg_sleep"),
+]
+
+RUNAWAY_QUERY = ("WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n WHERE x < 1000000000) "
+                 "SELECT COUNT(*) FROM n")
+
+
+@pytest.fixture
+def connection(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'guard.sqlite'}")
+    with engine.connect() as connection:
+        connection.exec_driver_sql("CREATE TABLE doctors (id INTEGER PRIMARY KEY, doctor_name TEXT)")
+        connection.exec_driver_sql("INSERT INTO doctors (doctor_name) VALUES " +
+                                   ", ".join(f"('Doctor {i}')" for i in range(50)))
+        connection.commit()
+        yield connection
+
+
+@pytest.mark.parametrize("sql_query", ALLOWED)
+def test_allows_read_only_queries(sql_query):
+    assert check_read_only(sql_query) == sql_query.strip().rstrip(";").strip()
+
+
+@pytest.mark.parametrize("sql_query, message", REJECTED)
+def test_rejects_writes_and_side_effects(sql_query, message):
+    with pytest.raises(SQLGuardError, match=message):
+        check_read_only(sql_query)
+
+
+def test_limit_wraps_the_query():
+    assert limit_rows("SELECT * FROM doctors ORDER BY id LIMIT 20", 5) == (
+        "SELECT * FROM (SELECT * FROM doctors ORDER BY id LIMIT 20) AS guarded_query LIMIT 5")
+
+
+def test_execute_limits_rows(connection):
+    guard = SQLGuard(max_rows=11)
+    columns, rows = guard.execute(connection, "SELECT doctor_name FROM doctors")
+    assert columns == ["doctor_name"]
+    assert len(rows) == 11
+    # The query's own, smaller LIMIT and ORDER BY still apply inside the wrapper.
+    _, rows = guard.execute(connection, "SELECT id FROM doctors ORDER BY id DESC LIMIT 3")
+    assert rows == [(50,), (49,), (48,)]
+
+
+def test_execute_rejects_writes_without_running_them(connection):
+    guard = SQLGuard()
+    with pytest.raises(SQLGuardError):
+        guard.execute(connection, "WITH gone AS (DELETE FROM doctors RETURNING *) SELECT * FROM gone")
+    assert guard.stats["rejected"] == 1
+    assert connection.exec_driver_sql("SELECT COUNT(*) FROM doctors").scalar() == 50
+
+
+def test_execute_stops_runaway_query(connection):
+    guard = SQLGuard(statement_timeout_ms=200)
+    with pytest.raises(SQLGuardError, match="longer than 200 ms"):
+        guard.execute(connection, RUNAWAY_QUERY)
+    assert guard.stats["timeouts"] == 1
+    # The connection is usable afterwards and no longer read-only.
+    connection.exec_driver_sql("INSERT INTO doctors (doctor_name) VALUES ('After')")
+    assert connection.exec_driver_sql("SELECT COUNT(*) FROM doctors").scalar() == 51
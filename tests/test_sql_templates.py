@@ -0,0 +1,40 @@
+import pytest
+from sqlalchemy import create_engine
+
+from sql_templates import SQLTemplateMatcher
+
+
+@pytest.fixture
+def matcher(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'templates.sqlite'}")
+    with engine.begin() as connection:
+        connection.exec_driver_sql("CREATE TABLE institutions (id INTEGER PRIMARY KEY, institution_name TEXT, "
+                                   "institution_type TEXT, institution_address TEXT)")
+        connection.exec_driver_sql("CREATE TABLE doctors (id INTEGER PRIMARY KEY, doctor_name TEXT, "
+                                   "specialization TEXT, field_of_interest TEXT, institution_id INTEGER)")
+        connection.exec_driver_sql("INSERT INTO institutions VALUES (1, 'Mayo Clinic', 'Private', 'Rochester'), "
+                                   "(2, 'Cedars-Sinai Medical Center', 'Private', 'Los Angeles'), "
+                                   "(3, 'Mayo Hospital', 'Public', 'Lahore')")
+        connection.exec_driver_sql("INSERT INTO doctors VALUES (1, 'Emily Williams', 'Neurology', 'Stroke', 1), "
+                                   "(2, 'James Brown', 'Cardiology', 'Hypertension', 2)")
+    return SQLTemplateMatcher(engine)
+
+
+def test_full_institution_name(matcher):
+    match = matcher.match("What is the address of Mayo Clinic?")
+    assert (match.name, match.params) == ("institution_address", {"institution_name": "Mayo Clinic"})
+
+
+def test_institution_name_with_punctuation(matcher):
+    match = matcher.match("Is Cedars-Sinai Medical Center private or public?")
+    assert match.params == {"institution_name": "Cedars-Sinai Medical Center"}
+
+
+def test_ambiguous_short_form_goes_to_the_llm(matcher):
+    # "Mayo" is short for both Mayo Clinic and Mayo Hospital.
+    assert matcher.match("Who works at Mayo?") is None
+
+
+def test_named_doctor_goes_to_the_llm(matcher):
+    assert matcher.match("Is Emily Williams a cardiologist?") is None
+    assert matcher.match("List all cardiologists.").params == {"specialization": "Cardiology"}
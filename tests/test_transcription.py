@@ -0,0 +1,20 @@
+from transcription import MAX_SEGMENT_SECONDS, WHISPER_SAMPLE_RATE, merge_segments
+
+SECOND = WHISPER_SAMPLE_RATE
+MAX_SAMPLES = MAX_SEGMENT_SECONDS * SECOND
+
+
+def test_short_segments_share_one_clip():
+    segments = [(0, 2 * SECOND), (3 * SECOND, 5 * SECOND), (8 * SECOND, 9 * SECOND)]
+    assert merge_segments(segments, MAX_SAMPLES) == [segments]
+
+
+def test_long_speech_is_split_at_segment_boundaries():
+    segments = [(0, 15 * SECOND), (16 * SECOND, 26 * SECOND), (27 * SECOND, 30 * SECOND)]
+    groups = merge_segments(segments, MAX_SAMPLES)
+    assert groups == [segments[:2], segments[2:]]
+    assert all(sum(end - start for start, end in group) <= MAX_SAMPLES for group in groups)
+
+
+def test_no_segments():
+    assert merge_segments([], MAX_SAMPLES) == []